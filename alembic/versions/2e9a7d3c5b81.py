@@ -0,0 +1,34 @@
+"""unique filter per service
+
+Revision ID: 2e9a7d3c5b81
+Revises: 8c2d4e6f1a37
+Create Date: 2026-10-19 11:48:52.610734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e9a7d3c5b81'
+down_revision = '8c2d4e6f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keep only the first row of every (service_id, description) appended by previous runs.
+    # The ids are read through a derived table, MySQL can not select from the table it
+    # deletes from (error 1093)
+    op.execute('DELETE FROM filter WHERE id NOT IN '
+               '(SELECT id FROM (SELECT MIN(id) AS id FROM filter '
+               'GROUP BY service_id, description) AS keep)')
+    # the stored hashes no longer match the deduplicated filters, extract everything again
+    op.execute('DELETE FROM filter_hash')
+    with op.batch_alter_table('filter') as batch_op:
+        batch_op.create_unique_constraint('uq_filter_service_description', ['service_id', 'description'])
+
+
+def downgrade():
+    with op.batch_alter_table('filter') as batch_op:
+        batch_op.drop_constraint('uq_filter_service_description', type_='unique')
@@ -0,0 +1,30 @@
+"""computed similar services
+
+Revision ID: c7b1e5a93d02
+Revises: a4f0c8e2d619
+Create Date: 2026-10-19 14:37:45.118263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b1e5a93d02'
+down_revision = 'a4f0c8e2d619'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('similar') as batch_op:
+        batch_op.add_column(sa.Column('similar_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('score', sa.Float(), nullable=True))
+        batch_op.create_foreign_key('fk_similar_similar_id_service', 'service', ['similar_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('similar') as batch_op:
+        batch_op.drop_constraint('fk_similar_similar_id_service', type_='foreignkey')
+        batch_op.drop_column('score')
+        batch_op.drop_column('similar_id')
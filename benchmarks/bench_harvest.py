@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+'''Items per second of every stage of the harvest pipeline, run in order against the mock server'''
+import os
+import runpy
+
+import pytest
+
+from conftest import ROOT, record_throughput, size_setting
+
+# (script, items it harvests from the catalogue)
+STAGES = [
+    ('services_list.py', lambda catalogue: catalogue.services),
+    ('service.py', lambda catalogue: catalogue.services),
+    ('endpoints_list.py', lambda catalogue: catalogue.services),
+    ('endpoint.py', lambda catalogue: catalogue.services * catalogue.endpoints_per_service),
+    ('tag.py', lambda catalogue: catalogue.services),
+    ('filter.py', lambda catalogue: catalogue.services),
+    ('similar.py', lambda catalogue: catalogue.services)
+]
+# stages that extract noun phrases with the nltk tagger
+TAGGER_STAGES = ['filter.py']
+
+@pytest.mark.parametrize('script,items', STAGES, ids=[script for script, _ in STAGES])
+def bench_harvest_stage(benchmark, request, biocatalogue, catalogue, script, items):
+    ''' Every stage reads what the previous one stored, so they must run in this order '''
+    if script in TAGGER_STAGES:
+        request.getfixturevalue('tagger')
+    path = os.path.join(ROOT, script)
+    benchmark.pedantic(runpy.run_path, args=(path,), kwargs={'run_name': '__main__'},
+                       rounds=size_setting('BENCH_ROUNDS', 3), iterations=1)
+    record_throughput(benchmark, items(catalogue))
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+'''Sentences per second of the noun phrase extractor'''
+import pytest
+
+from conftest import record_throughput
+from labio import NPParser
+from labio.mockserver import MockCatalogue
+
+SENTENCES = 500
+
+@pytest.fixture(scope='module')
+def sentences(tagger):
+    catalogue = MockCatalogue()
+    return ['%s service for the %s of %s data.' % tuple(catalogue.words(idx, 3))
+            for idx in range(SENTENCES)]
+
+def extract_all(sentences, extract):
+    for sentence in sentences:
+        extract(NPParser.NPExtractor(sentence))
+
+def bench_extract_uncached(benchmark, sentences):
+    benchmark(extract_all, sentences, NPParser.NPExtractor.extract_uncached)
+    record_throughput(benchmark, SENTENCES)
+
+def bench_extract_cached(benchmark, sentences):
+    extract_all(sentences, NPParser.NPExtractor.extract)
+    benchmark(extract_all, sentences, NPParser.NPExtractor.extract)
+    record_throughput(benchmark, SENTENCES)
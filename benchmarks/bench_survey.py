@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+'''Throughput of the SurveyProcessor transforms on large synthetic surveys'''
+import pytest
+
+from conftest import record_throughput, size_setting
+from labio.SMWrapper import SurveyApi, SurveyProcessor
+from labio.fixtures import synthetic_matrix_survey, synthetic_survey
+
+RESPONDENTS = size_setting('BENCH_RESPONDENTS', 5000)
+
+def preloaded(survey):
+    details, responses = survey(RESPONDENTS)
+    processor = SurveyProcessor('S1', None)
+    processor.preload(details, responses)
+    processor.build_question_data()
+    processor.build_respondent_data()
+    return processor
+
+@pytest.fixture(scope='module')
+def matrix_processor():
+    processor = preloaded(synthetic_matrix_survey)
+    processor.build_answer_data()
+    return processor
+
+@pytest.fixture(scope='module')
+def mixed_processor():
+    processor = preloaded(synthetic_survey)
+    processor.build_answer_data()
+    return processor
+
+def bench_build_answer_data(benchmark):
+    processor = preloaded(synthetic_matrix_survey)
+    benchmark(processor.build_answer_data)
+    record_throughput(benchmark, RESPONDENTS)
+
+def bench_transpose_questions(benchmark, mixed_processor):
+    benchmark(mixed_processor.transpose_questions, {'P1': ['Q1', 'Q2', 'Q4']})
+    record_throughput(benchmark, RESPONDENTS)
+
+def bench_transpose_topic_score(benchmark, matrix_processor):
+    benchmark(matrix_processor.transpose_questions, {'P1': ['Q0', 'Q1', 'Q2']},
+              use_topic=True, use_score=True)
+    record_throughput(benchmark, RESPONDENTS)
+
+def bench_build_padded_answers(benchmark, matrix_processor):
+    benchmark(matrix_processor.build_padded_answers)
+    record_throughput(benchmark, RESPONDENTS)
+
+def bench_breakdown_multiple_answers(benchmark, mixed_processor):
+    rows = mixed_processor.transpose_questions({'P1': ['Q1', 'Q2']})
+    benchmark(mixed_processor.breakdown_multiple_answers, ['Question 2'], rows)
+    record_throughput(benchmark, RESPONDENTS)
+
+def bench_process_from_api(benchmark, catalogue, mock_server):
+    ''' Download the payloads from the mock server and build the records, like survey.py '''
+    catalogue.add_survey('S1', *synthetic_matrix_survey(RESPONDENTS))
+
+    def process():
+        processor = SurveyProcessor('S1', 'token', api=SurveyApi('token', host=mock_server.url))
+        processor.build_question_data()
+        processor.build_respondent_data()
+        processor.build_answer_data()
+        processor.build_collectors_data()
+
+    benchmark.pedantic(process, rounds=size_setting('BENCH_ROUNDS', 3), iterations=1)
+    record_throughput(benchmark, RESPONDENTS)
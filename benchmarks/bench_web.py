@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+'''Latency of the web routes over catalogues of 10k and 100k rows'''
+import os
+import random
+
+import pytest
+
+from conftest import WORKDIR, size_setting
+from labio.config import AppConfig
+from labio.mockserver import WORDS
+
+ROWS = [int(rows) for rows in os.environ.get('BENCH_WEB_ROWS', '10000,100000').split(',')]
+PAGES = ['/services', '/endpoints', '/details', '/filters']
+
+def seed(rows):
+    ''' Fill the catalogue tables with rows services, endpoints, details and filters '''
+    from models.models import Service, Endpoint, Details, Filters
+    rnd = random.Random(rows)
+
+    def text(count):
+        return ' '.join(rnd.choice(WORDS) for _ in range(count))
+
+    Service.bulk_insert({'id': idx, 'name': 'service%d' % idx, 'description': text(120),
+                         'entrypoint': 'https://www.biocatalogue.org/services/%d' % idx,
+                         'base_url': 'http://ws.example.org/service%d' % idx,
+                         'doc_url': 'http://docs.example.org/service%d' % idx}
+                        for idx in range(1, rows + 1))
+    Endpoint.bulk_insert({'id': idx, 'name': 'get_%s' % rnd.choice(WORDS), 'label': '-',
+                          'description': text(40), 'url': 'http://www.biocatalogue.org/rest_methods/%d' % idx,
+                          'template': '-', 'parameters': 'id, format', 'service_id': idx,
+                          'service_name': 'service%d' % idx}
+                         for idx in range(1, rows + 1))
+    Details.bulk_insert({'detail_id': idx, 'detail_name': 'added service%d' % idx,
+                         'detail_description': text(20)} for idx in range(1, rows + 1))
+    Filters.bulk_insert({'id': idx, 'description': text(2), 'service_id': idx}
+                        for idx in range(1, rows + 1))
+    Service.session.commit()
+
+def web_config(rows, page_cache_size):
+    config = AppConfig()
+    config.DB_SERVER = 'sqlite:///%s' % os.path.join(WORKDIR, 'web%d.db' % rows)
+    config.WEB_PRELOAD = False
+    config.PAGE_CACHE_SIZE = page_cache_size
+    return config
+
+@pytest.fixture(scope='module', params=ROWS, ids=['%drows' % rows for rows in ROWS])
+def rows(request):
+    from webpage import create_app
+    from labio import recommend, versions
+    create_app(web_config(request.param, 0))
+    seed(request.param)
+    # every database starts at version 0, forget the version and index of the previous one
+    versions._checked.clear()
+    recommend._index = None
+    return request.param
+
+@pytest.fixture
+def client(rows):
+    from webpage import create_app
+    return create_app(web_config(rows, 0)).test_client()
+
+@pytest.fixture
+def cached_client(rows):
+    from webpage import create_app
+    return create_app(web_config(rows, 64)).test_client()
+
+def get(client, path, status=200, **kwargs):
+    response = client.get(path, **kwargs)
+    assert response.status_code == status
+    response.close()
+    return response
+
+@pytest.mark.parametrize('path', PAGES)
+def bench_render_page(benchmark, client, path):
+    ''' The page is rendered from the database on every request '''
+    benchmark.pedantic(get, args=(client, path), rounds=size_setting('BENCH_ROUNDS', 3),
+                       iterations=1)
+
+@pytest.mark.parametrize('path', PAGES)
+def bench_cached_page(benchmark, cached_client, path):
+    ''' The page is answered from the page cache, compressed '''
+    get(cached_client, path)
+    benchmark(get, cached_client, path, headers={'Accept-Encoding': 'gzip'})
+
+@pytest.mark.parametrize('path', PAGES)
+def bench_not_modified(benchmark, cached_client, path):
+    ''' The client has the page already '''
+    etag = get(cached_client, path).headers['ETag']
+    benchmark(get, cached_client, path, 304, headers={'If-None-Match': etag})
+
+def bench_recommend(benchmark, client, tagger):
+    get(client, '/recommend?q=protein')
+    benchmark(get, client, '/recommend?q=protein+sequence+alignment&limit=20')
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+'''Fixtures of the benchmark suite.
+
+   The harvest scripts read the BioCatalogue pages and the survey processor reads the
+   SurveyMonkey payloads from labio.mockserver, serving a synthetic catalogue, so the
+   numbers do not depend on the network. Everything is written to a temporary SQLite
+   database.
+
+   Run from the repository root, so alembic.ini is found:
+
+       pip install pytest pytest-benchmark
+       python -m pytest benchmarks --benchmark-save=baseline
+       python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=min:25%
+
+   The sizes are set with BENCH_SERVICES, BENCH_ENDPOINTS, BENCH_RESPONDENTS and
+   BENCH_WEB_ROWS (comma separated row counts), the rounds of the slow benchmarks
+   with BENCH_ROUNDS and the seconds the mock server waits per response with
+   BENCH_LATENCY'''
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# the configuration is read when labio is imported
+WORKDIR = tempfile.mkdtemp(prefix='labio-bench-')
+os.environ.setdefault('DB_SERVER', 'sqlite:///%s' % os.path.join(WORKDIR, 'harvest.db'))
+
+import labio
+from labio.mockserver import MockCatalogue, MockServer
+
+def size_setting(name, default):
+    return int(os.environ.get(name, default))
+
+def record_throughput(benchmark, items):
+    ''' Store the items per second of the mean round with the results '''
+    benchmark.extra_info['items'] = items
+    if benchmark.stats is not None:
+        benchmark.extra_info['items_per_second'] = items / benchmark.stats.stats.mean
+
+@pytest.fixture(scope='session')
+def tagger():
+    ''' The noun phrase tagger, trained on the nltk corpora '''
+    from labio import NPParser
+    try:
+        return NPParser.get_tagger()
+    except LookupError:
+        pytest.skip('the nltk brown corpus and punkt tokenizer are not installed')
+
+@pytest.fixture(scope='session')
+def catalogue():
+    return MockCatalogue(services=size_setting('BENCH_SERVICES', 200),
+                         endpoints_per_service=size_setting('BENCH_ENDPOINTS', 3))
+
+@pytest.fixture(scope='session')
+def mock_server(catalogue):
+    with MockServer(catalogue, latency=float(os.environ.get('BENCH_LATENCY', 0))) as server:
+        yield server
+
+@pytest.fixture(scope='session')
+def biocatalogue(mock_server):
+    ''' Points the harvest scripts to the mock server '''
+    with mock.patch.object(labio.config, 'BIOCATALOGUE_URL', mock_server.url):
+        yield mock_server
@@ -1,12 +1,16 @@
 from models.models import Endpoints_List
 from models.models import Endpoint
+from models.models import Endpoint_Parameter
 from models.models import Details
 from models.models import Logs
 import requests, json, labio
+from labio.versions import publish_version
 
 labio.db.init()
 
 end_record = Endpoint()
+# every input of every endpoint, stored together at the end
+parameters = []
 for end in Endpoints_List.query.all():
     response = requests.get(end.url+'.json')
     Endpoints = response.json()
@@ -30,10 +34,20 @@ for end in Endpoints_List.query.all():
         end_record.template = Endpoints['url_template']
     else:
         end_record.template = '-'
+    names = []
     for inputs in Endpoints['inputs']:  
-        end_record.parameters = inputs['name']
+        names.append(inputs['name'])
+        parameters.append({'name': inputs['name'],
+                           'description': inputs.get('description'),
+                           'endpoint_id': end.id,
+                           'service_id': end.service_id})
+    end_record.parameters = ', '.join(names)
     end_record.service_id = end.service_id
     end_record.service_name = end.service_name
     end_record.merge()
     end_record.session.commit()
-end_record.session.commit()
\ No newline at end of file
+end_record.session.commit()
+Endpoint_Parameter.query.delete(synchronize_session=False)
+print('parameters:', Endpoint_Parameter.bulk_insert(parameters))
+Endpoint_Parameter.session.commit()
+publish_version()
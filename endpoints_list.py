@@ -6,8 +6,10 @@ import requests, labio, re
 import labio
 import re    # para pegar apenas os números de uma url (id)
 from bs4 import BeautifulSoup
+from labio.versions import publish_version
 
 labio.db.init()
+biocatalogue = labio.config.BIOCATALOGUE_URL.rstrip('/')
 end_record = Endpoints_List()
 svcs = Service.query.all()
 
@@ -15,8 +17,8 @@ svcs = Service.query.all()
 for item in svcs:
     # os números da url representam o id do endpoint    
     id = item.entrypoint
-    id = re.sub('[^0-9]', '', id)
-    response = requests.get('https://www.biocatalogue.org/services/'+str(id)+'/service_endpoint')
+    id = re.sub('[^0-9]', '', id.rsplit('/', 1)[-1])
+    response = requests.get(biocatalogue+'/services/'+str(id)+'/service_endpoint')
     print(response.status_code)
     # utiliza o soup para encontrar no html a classe 'entry', onde ficam os endpoints
     soup = BeautifulSoup(response.text, 'html.parser')
@@ -24,11 +26,12 @@ for item in svcs:
     print('serviço:',id,'-',item.name)
     for service in services_list:
         end_record = Endpoints_List()
-        end_record.url = 'http://www.biocatalogue.org' + service.a.get('href')
+        end_record.url = biocatalogue + service.a.get('href')
         end_record.service_id = item.id
         end_record.service_name = item.name
         id_value = end_record.url
-        end_record.id = re.sub('[^0-9]', '', id_value)
+        end_record.id = re.sub('[^0-9]', '', id_value.rsplit('/', 1)[-1])
         end_record.merge()
         end_record.session.commit()
-end_record.session.commit()
\ No newline at end of file
+end_record.session.commit()
+publish_version()
@@ -1,170 +1,61 @@
 from models.models import Service
-from models.models import Endpoint
-from models.models import Similar
-from models.models import Tag
-from models.models import Logs
-from models.models import Details
 from models.models import Filters
-import labio, nltk, requests, re, flask, time, traceback, textblob
-from bs4 import BeautifulSoup
-from nltk import word_tokenize, sent_tokenize
+from models.models import Filters_Hash
+import labio, traceback
+from sqlalchemy.orm import undefer
+from labio import NPParser, terms
 from labio.NPParser import NPExtractor
+from labio.keywords import PUNCTUATION, normalize
+from labio.versions import publish_version
 
 labio.db.init()
-
-regs = Filters.query.count()
-
-
-PUNCTUATION = ['.', ',', ':', '-', '?', '!', '%']
-CONTRACTIONS = {
-    "ain't": "am not",
-    "aren't": "are not",
-    "can't": "cannot",
-    "can't've": "cannot have",
-    "'cause": "because",
-    "could've": "could have",
-    "couldn't": "could not",
-    "couldn't've": "could not have",
-    "didn't": "did not",
-    "doesn't": "does not",
-    "don't": "do not",
-    "hadn't": "had not",
-    "hadn't've": "had not have",
-    "hasn't": "has not",
-    "haven't": "have not",
-    "he'd": "he would",
-    "he'd've": "he would have",
-    "he'll": "he will",
-    "he'll've": "he will have",
-    "he's": "he is",
-    "how'd": "how did",
-    "how'd'y": "how do you",
-    "how'll": "how will",
-    "how's": "how is",
-    "I'd": "I would",
-    "I'd've": "I would have",
-    "I'll": "I will",
-    "I'll've": "I will have",
-    "I'm": "I am",
-    "I've": "I have",
-    "isn't": "is not",
-    "it'd": "it would",
-    "it'd've": "it would have",
-    "it'll": "it will",
-    "it'll've": "it will have",
-    "it's": "it is",
-    "let's": "let us",
-    "ma'am": "madam",
-    "mayn't": "may not",
-    "might've": "might have",
-    "mightn't": "might not",
-    "mightn't've": "might not have",
-    "must've": "must have",
-    "mustn't": "must not",
-    "mustn't've": "must not have",
-    "needn't": "need not",
-    "needn't've": "need not have",
-    "o'clock": "of the clock",
-    "oughtn't": "ought not",
-    "oughtn't've": "ought not have",
-    "shan't": "shall not",
-    "sha'n't": "shall not",
-    "shan't've": "shall not have",
-    "she'd": "she would",
-    "she'd've": "she would have",
-    "she'll": "she will",
-    "she'll've": "she will have",
-    "she's": "she is",
-    "should've": "should have",
-    "shouldn't": "should not",
-    "shouldn't've": "should not have",
-    "so've": "so have",
-    "so's": "so is",
-    "that'd": "that would",
-    "that'd've": "that would have",
-    "that's": "that is",
-    "there'd": "there would",
-    "there'd've": "there would have",
-    "there's": "there is",
-    "they'd": "they would",
-    "they'd've": "they would have",
-    "they'll": "they will",
-    "they'll've": "they will have",
-    "they're": "they are",
-    "they've": "they have",
-    "to've": "to have",
-    "wasn't": "was not",
-    "we'd": "we would",
-    "we'd've": "we would have",
-    "we'll": "we will",
-    "we'll've": "we will have",
-    "we're": "we are",
-    "we've": "we have",
-    "weren't": "were not",
-    "what'll": "what will",
-    "what'll've": "what will have",
-    "what're": "what are",
-    "what's": "what is",
-    "what've": "what have",
-    "when's": "when is",
-    "when've": "when have",
-    "where'd": "where did",
-    "where's": "where is",
-    "where've": "where have",
-    "who'll": "who will",
-    "who'll've": "who will have",
-    "who's": "who is",
-    "who've": "who have",
-    "why's": "why is",
-    "why've": "why have",
-    "will've": "will have",
-    "won't": "will not",
-    "won't've": "will not have",
-    "would've": "would have",
-    "wouldn't": "would not",
-    "wouldn't've": "would not have",
-    "y'all": "you all",
-    "y'all'd": "you all would",
-    "y'all'd've": "you all would have",
-    "y'all're": "you all are",
-    "y'all've": "you all have",
-    "you'd": "you would",
-    "you'd've": "you would have",
-    "you'll": "you will",
-    "you'll've": "you will have",
-    "you're": "you are",
-    "you've": "you have"
-}
-
-def __decontract(phrase):
-    """
-        Eliminate the word contractions in the sentences
-    """
-    #print(phrase)
-    dec_phrase = phrase #.replace("´", "'")
-    for key in CONTRACTIONS:
-        dec_phrase = dec_phrase.replace(key, CONTRACTIONS[key])
-
-    return dec_phrase
+if labio.config.NP_CACHE_PATH:
+    NPParser.use_persistent_cache(labio.config.NP_CACHE_PATH)
 
 
 def build_open_ended_data():
     try:
-        svc = Service.query.all()
+        svc = Service.query.options(undefer('description')).all()
+        # hash of the description each service had when its filters were extracted
+        hashes = {fil_hash.service_id: fil_hash.description_hash for fil_hash in Filters_Hash.query.all()}
+        changed_terms = set()
+        changed_services = []
         line_count = 0
         for line in svc:
             line_count += 1
-            d_line = __decontract(line.description.lower())
+            d_line = normalize(line.description or '')
+            d_hash = NPParser.sentence_hash(d_line)
+            # description unchanged since the last run, its filters are up to date
+            if hashes.get(line.id) == d_hash:
+                continue
             np_extractor = NPExtractor(d_line)
             results = np_extractor.extract()
+            words = []
             for word in results:
-                if word not in PUNCTUATION:
+                if word not in PUNCTUATION and word not in words:
+                    words.append(word)
+            changed_terms |= terms.update_service_terms(line.id, [word for word in results if word not in PUNCTUATION])
+            changed_services.append(line.id)
+            # apply only the difference between the stored and the new filters
+            current = {fil.description: fil for fil in Filters.query.filter(Filters.service_id == line.id)}
+            for word in words:
+                if word not in current:
                     fil = Filters()
                     fil.description = word
                     fil.service_id = line.id
-                    fil.merge()
-                    fil.session.commit()
+                    fil.add()
+            for word in current:
+                if word not in words:
+                    current[word].delete()
+            fil_hash = Filters_Hash()
+            fil_hash.service_id = line.id
+            fil_hash.description_hash = d_hash
+            fil_hash.merge()
+        terms.refresh_weights(len(svc), changed_terms, changed_services)
+        Filters.session.commit()
+        publish_version()
     except:
+        Filters.session.rollback()
         svc = None
         print(traceback.format_exc())
     return svc
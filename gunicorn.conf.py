@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+'''gunicorn settings of the web app: gunicorn -c gunicorn.conf.py "webpage:create_app()"
+
+   The app is created once in the master and the workers are forked from it.
+   WORKER_CLASS=gevent serves the requests with greenlets instead of threads.'''
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('THREADS', 4))
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+preload_app = True
+timeout = 30
+
+def pre_fork(server, worker):
+    # the objects loaded by the master are never collected, so the garbage
+    # collector of the workers does not copy their memory pages
+    gc.freeze()
+
+def post_worker_init(worker):
+    # runs after gevent patched threading: new thread local sessions, own connections
+    import labio
+    labio.db.dispose()
@@ -1,6 +1,7 @@
 # coding=UTF-8
-import nltk
-from nltk.corpus import brown
+import hashlib
+import threading
+from labio.cache import Cache
 
 # This is a fast and simple noun phrase extractor (based on NLTK)
 # Feel free to use it, just keep a link back to this post
@@ -10,24 +11,36 @@ from nltk.corpus import brown
 
 
 # This is our fast Part of Speech tagger
+# It is trained on the Brown corpus the first time a sentence is tagged, so
+# importing this module does not load nltk
 #############################################################################
-BROWN_TRAIN = brown.tagged_sents(categories='news')
-REGEXP_TAGGER = nltk.RegexpTagger(
-    [(r'^-?[0-9]+(.[0-9]+)?$', 'CD'),
-     (r'(-|:|;)$', ':'),
-     (r'\'*$', 'MD'),
-     (r'(The|the|A|a|An|an)$', 'AT'),
-     (r'.*able$', 'JJ'),
-     (r'^[A-Z].*$', 'NNP'),
-     (r'.*ness$', 'NN'),
-     (r'.*ly$', 'RB'),
-     (r'.*s$', 'NNS'),
-     (r'.*ing$', 'VBG'),
-     (r'.*ed$', 'VBD'),
-     (r'.*', 'NN')
-])
-unigram_tagger = nltk.UnigramTagger(BROWN_TRAIN, backoff=REGEXP_TAGGER)
-bigram_tagger = nltk.BigramTagger(BROWN_TRAIN, backoff=unigram_tagger)
+bigram_tagger = None
+_tagger_lock = threading.Lock()
+
+def get_tagger():
+    global bigram_tagger
+    with _tagger_lock:
+        if bigram_tagger is None:
+            import nltk
+            from nltk.corpus import brown
+            brown_train = brown.tagged_sents(categories='news')
+            regexp_tagger = nltk.RegexpTagger(
+                [(r'^-?[0-9]+(.[0-9]+)?$', 'CD'),
+                 (r'(-|:|;)$', ':'),
+                 (r'\'*$', 'MD'),
+                 (r'(The|the|A|a|An|an)$', 'AT'),
+                 (r'.*able$', 'JJ'),
+                 (r'^[A-Z].*$', 'NNP'),
+                 (r'.*ness$', 'NN'),
+                 (r'.*ly$', 'RB'),
+                 (r'.*s$', 'NNS'),
+                 (r'.*ing$', 'VBG'),
+                 (r'.*ed$', 'VBD'),
+                 (r'.*', 'NN')
+            ])
+            unigram_tagger = nltk.UnigramTagger(brown_train, backoff=regexp_tagger)
+            bigram_tagger = nltk.BigramTagger(brown_train, backoff=unigram_tagger)
+        return bigram_tagger
 #############################################################################
 
 
@@ -42,6 +55,20 @@ cfg["JJ+NN"] = "NNI"
 #############################################################################
 
 
+# Extraction results keyed by the hash of the sentence
+#############################################################################
+cache = Cache(maxsize=20000)
+
+def sentence_hash(sentence):
+    return hashlib.sha1(sentence.encode('utf-8')).hexdigest()
+
+# Keep the extraction results in a SQLite file, so they survive between runs
+def use_persistent_cache(path, maxsize=20000):
+    global cache
+    cache = Cache(maxsize=maxsize, path=path, table='np_extract')
+#############################################################################
+
+
 class NPExtractor(object):
 
     def __init__(self, sentence):
@@ -49,6 +76,7 @@ class NPExtractor(object):
 
     # Split the sentence into singlw words/tokens
     def tokenize_sentence(self, sentence):
+        import nltk
         tokens = nltk.word_tokenize(sentence)
         return tokens
 
@@ -68,11 +96,20 @@ class NPExtractor(object):
             n_tagged.append((t[0], t[1]))
         return n_tagged
 
-    # Extract the main topics from the sentence
+    # Extract the main topics from the sentence, reusing the cached result
+    # when the same sentence was already extracted
     def extract(self):
+        key = sentence_hash(self.sentence)
+        matches = cache.get(key)
+        if matches is None:
+            matches = self.extract_uncached()
+            cache.set(key, matches)
+        return list(matches)
+
+    def extract_uncached(self):
 
         tokens = self.tokenize_sentence(self.sentence)
-        tags = self.normalize_tags(bigram_tagger.tag(tokens))
+        tags = self.normalize_tags(get_tagger().tag(tokens))
 
         merge = True
         while merge:
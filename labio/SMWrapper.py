@@ -2,15 +2,55 @@
 """
     Wrapper module for survey monkey api
 """
+import functools
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import tempfile
 import time
 import re
 import traceback
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 import requests
-import textblob
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 from .NPParser import NPExtractor
-import nltk
+from .cache import LRUCache
+from .records import AnswerRecord, OpenEndedRecord, SentimentRecord
+
+TAG_RE = re.compile(r'<[^>]+>')
+SCORE_RE = re.compile(r"^([-+]*[\s]*[0-9]+)")
+
+@functools.lru_cache(maxsize=4096)
+def parse_score(value):
+    """
+        Return the score at the start of a choice text ("5 - Agree" -> 5), or 0.
+        Choice texts repeat for every respondent, so the results are memoized
+    """
+    match = SCORE_RE.match(value)
+    if match is None:
+        return 0
+    return int(match.group().strip().replace(" ", ""))
+
+# Sentiment of the open ended answers, shared by every processor of this process
+SENTIMENT_CACHE = LRUCache(50000)
+
+def sentence_sentiment(text):
+    """
+        Return a (sentence, polarity, subjectivity) list for the sentences of the text
+    """
+    import textblob
+    return [(str(sentence), sentence.polarity, sentence.subjectivity)
+            for sentence in textblob.TextBlob(text).sentences]
 
 # -------------------------------------------------------------------------------------------------
 # Wrapper class for survey monkey api
@@ -25,6 +65,7 @@ class SurveyApi():
     __HOST = "https://api.surveymonkey.net"
     __ENDPOINTS = {
         "get_surveys": "/v3/surveys",
+        "get_survey_info": "/v3/surveys/%s",
         "get_survey": "/v3/surveys/%s/details",
         "get_survey_data": "/v3/surveys/%s/responses/bulk",
         "get_survey_respondents": "/v3/surveys/%s/responses",
@@ -37,10 +78,12 @@ class SurveyApi():
         "Content-Type": "application/json"
     }
 
-    def __init__(self, access_token, proxy=None):
+    def __init__(self, access_token, proxy=None, host=None):
         """
-            Class constructor
+            Class constructor. host replaces the api server, e.g. with a local stub
         """
+        if host:
+            self.__HOST = host
         self.__client = requests.session()
         if proxy:
             self.__client.proxies.update(proxy)
@@ -53,27 +96,68 @@ class SurveyApi():
             return generic json from generic url
         """
         response = self.__client.get(url, params=param)
+        response.raise_for_status()
         response_json = response.json()
         return response_json
 
-    def get_paginated_results(self, url, page_interval, param=None):
+    def __iter_page(self, url, param, links):
         """
-            Get all the results from all the pages of the url
+            Yield the items of the 'data' list of a single page, filling links
+            with the page 'links' object. With ijson installed the page is parsed
+            while it is downloaded, so only one item is held in memory at a time.
+            Raises requests.HTTPError on an error status and ValueError when the
+            page has no 'data' list, so an error is never read as an empty page
+        """
+        if ijson is None:
+            response_page = self.get_from_url(url, param)
+            if not isinstance(response_page.get('data'), list):
+                raise ValueError("No data in the page %s" % url)
+            links.update(response_page.get('links', {}))
+            for item in response_page['data']:
+                yield item
+            return
+
+        with self.__client.get(url, params=param, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            builder = None
+            has_data = False
+            for prefix, event, value in ijson.parse(response.raw, use_float=True):
+                if prefix == 'data' and event == 'start_array':
+                    has_data = True
+                if prefix == 'data.item' and event == 'start_map':
+                    builder = ijson.ObjectBuilder()
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == 'data.item' and event == 'end_map':
+                        yield builder.value
+                        builder = None
+                elif prefix.startswith('links.') and event == 'string':
+                    links[prefix[len('links.'):]] = value
+            if not has_data:
+                raise ValueError("No data in the page %s" % url)
+
+    def iter_paginated_results(self, url, page_interval, param=None):
+        """
+            Yield the results from all the pages of the url, one at a time
             It is expected the result returned from the first url
             will have metadata to indicate what is the next page to
             be fetched.
         """
-        response_page = self.get_from_url(url, param)
-        raw_data = response_page['data']
-        if 'next' in response_page['links']:
-            while True:
-                response_page = self.get_from_url(response_page['links']['next'], param)
-                raw_data += response_page['data']
-                if 'next' in response_page['links']:
-                    time.sleep(page_interval)
-                    continue
+        while True:
+            links = {}
+            for item in self.__iter_page(url, param, links):
+                yield item
+            if 'next' not in links:
                 break
-        return raw_data
+            url = links['next']
+            time.sleep(page_interval)
+
+    def get_paginated_results(self, url, page_interval, param=None):
+        """
+            Get all the results from all the pages of the url
+        """
+        return list(self.iter_paginated_results(url, page_interval, param))
 
     def get_surveys(self, param=None):
         """
@@ -82,6 +166,14 @@ class SurveyApi():
         uri = "%s%s" % (self.__HOST, self.__ENDPOINTS[self.get_surveys.__name__])
         return self.get_paginated_results(uri, 2, param)
 
+    def get_survey_info(self, survey_id):
+        """
+            return the survey summary (title, date_modified, response_count)
+        """
+        uri = "%s%s" % (self.__HOST, self.__ENDPOINTS[self.get_survey_info.__name__])
+        uri = uri % survey_id
+        return self.get_from_url(uri)
+
     def get_survey(self, survey_id):
         """
             return the survey details (pages, questions)
@@ -98,6 +190,14 @@ class SurveyApi():
         uri = uri % survey_id
         return self.get_paginated_results(uri, 2)
 
+    def iter_survey_data(self, survey_id):
+        """
+            yield survey responses as they are downloaded
+        """
+        uri = "%s%s" % (self.__HOST, self.__ENDPOINTS[self.get_survey_data.__name__])
+        uri = uri % survey_id
+        return self.iter_paginated_results(uri, 2)
+
     def get_survey_respondents(self, survey_id):
         """
             get survey responses
@@ -130,6 +230,50 @@ class SurveyApi():
         uri = uri % (survey_id, response_id)
         return self.get_from_url(uri)
         
+# -------------------------------------------------------------------------------------------------
+# Persistent cache for survey api payloads
+# -------------------------------------------------------------------------------------------------
+class SurveyCache():
+    """
+        Stores survey api payloads as compressed JSON files in a directory.
+        Entries are keyed by survey id, payload name and survey version, so a
+        survey that has not changed since the last run is not fetched again
+    """
+    __directory = None
+
+    def __init__(self, directory):
+        """
+            Class constructor
+        """
+        self.__directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, survey_id, name, version, suffix='.json.gz'):
+        """
+            Return the file name for a cache entry
+        """
+        digest = hashlib.sha1(version.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.__directory, "%s-%s-%s%s" % (survey_id, name, digest, suffix))
+
+    def get(self, survey_id, name, version):
+        """
+            Return the cached payload, or None when there is no entry for this version
+        """
+        path = self.path(survey_id, name, version)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, 'rt', encoding='utf-8') as fi:
+            return json.load(fi)
+
+    def set(self, survey_id, name, version, payload):
+        """
+            Store the payload for this version of the survey
+        """
+        path = self.path(survey_id, name, version)
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as fo:
+            json.dump(payload, fo)
+        os.replace(path + '.tmp', path)
+
 # -------------------------------------------------------------------------------------------------
 # Methods to build the data file structures
 # -------------------------------------------------------------------------------------------------
@@ -260,39 +404,155 @@ class SurveyProcessor():
     }
 
     __api = None
+    __cache = None
+    __fetched = None
+    __spool = None
+    __raw_dump = None
+    __sentiment_cache = None
     __survey_id = None
     __questions = None
     __respondents = None
     __answers = None
+    __topics = None
     __open_ended = None
     __collectors = None
 
-    def __init__(self, survey_id, access_token, proxy=None):
+    def __init__(self, survey_id, access_token, proxy=None, api=None, cache=None,
+                 raw_dump=None, sentiment_cache=None):
         """
             Class constructor
+            cache is an optional SurveyCache used to skip payloads that did not
+            change since they were stored
+            raw_dump is an optional path where the bulk responses are kept as
+            gzipped JSON lines
+            sentiment_cache replaces the in-memory SENTIMENT_CACHE, e.g. with a
+            labio.cache.Cache that has a persistent tier
         """
         self.__survey_id = survey_id
-        self.__api = SurveyApi(access_token, proxy)
+        self.__api = api or SurveyApi(access_token, proxy)
+        self.__cache = cache
+        self.__raw_dump = raw_dump
+        self.__sentiment_cache = sentiment_cache or SENTIMENT_CACHE
+        self.__fetched = {}
 
-    def __return_score(self, value):
+    def preload(self, survey=None, survey_data=None):
         """
-            Analyze the textual answer and retrieve the value for score
+            Use survey details and bulk responses that were already fetched,
+            so the build methods do not request them again
         """
-        return_value = 0
-        regex = r"^([-+]*[\s]*[0-9]+)"
+        if survey is not None:
+            self.__fetched['survey'] = survey
+        if survey_data is not None:
+            self.__fetched['survey_data'] = survey_data
 
-        matches = re.finditer(regex, value)
+    def __survey_version(self):
+        """
+            Return a string that changes whenever the survey or its responses change
+        """
+        if 'version' not in self.__fetched:
+            info = self.__api.get_survey_info(self.__survey_id)
+            self.__fetched['version'] = "%s|%s" % (info.get('date_modified'),
+                                                   info.get('response_count'))
+        return self.__fetched['version']
 
-        for _, match in enumerate(matches):
-            return_value = int(match.group().lstrip().rstrip().replace(" ",""))
-            break
-        return return_value
+    def __fetch(self, name, loader):
+        """
+            Return the named api payload, fetching it at most once per processor
+            and reusing the persistent cache when the survey did not change
+        """
+        if name in self.__fetched:
+            return self.__fetched[name]
+
+        payload = None
+        if self.__cache is not None:
+            payload = self.__cache.get(self.__survey_id, name, self.__survey_version())
+        if payload is None:
+            payload = loader(self.__survey_id)
+            if self.__cache is not None:
+                self.__cache.set(self.__survey_id, name, self.__survey_version(), payload)
+
+        self.__fetched[name] = payload
+        return payload
+
+    def __get_survey(self):
+        """
+            Return the survey details (pages, questions)
+        """
+        return self.__fetch('survey', self.__api.get_survey)
+
+    def __iter_survey_data(self):
+        """
+            Return an iterator over the survey bulk responses. The first pass
+            streams them from the api into a compressed spool file and later
+            passes read the spool, so the responses are downloaded only once
+            without being held in memory
+        """
+        if 'survey_data' in self.__fetched:
+            return iter(self.__fetched['survey_data'])
+
+        if self.__spool is None and self.__cache is not None:
+            path = self.__cache.path(self.__survey_id, 'survey_data',
+                                     self.__survey_version(), '.jsonl.gz')
+            if os.path.exists(path):
+                self.__spool = path
+        if self.__spool is None:
+            return self.__stream_survey_data()
+        return self.__read_spool(self.__spool)
+
+    def __stream_survey_data(self):
+        """
+            Yield the bulk responses from the api while writing them to the spool.
+            The spool is only kept when every page was read
+        """
+        if self.__cache is not None:
+            path = self.__cache.path(self.__survey_id, 'survey_data',
+                                     self.__survey_version(), '.jsonl.gz')
+        elif self.__raw_dump is not None:
+            path = self.__raw_dump
+        else:
+            handle, path = tempfile.mkstemp(suffix='.jsonl.gz')
+            os.close(handle)
+            weakref.finalize(self, os.remove, path)
+
+        try:
+            with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as fo:
+                for response in self.__api.iter_survey_data(self.__survey_id):
+                    fo.write(json.dumps(response))
+                    fo.write('\n')
+                    yield response
+        except BaseException:
+            os.remove(path + '.tmp')
+            raise
+        os.replace(path + '.tmp', path)
+        if self.__raw_dump is not None and self.__raw_dump != path:
+            shutil.copyfile(path, self.__raw_dump)
+        self.__spool = path
+
+    def __read_spool(self, path):
+        """
+            Yield the responses stored in a spool file
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as fi:
+            for line in fi:
+                yield json.loads(line)
+
+    def __get_collectors(self):
+        """
+            Return the survey collectors
+        """
+        return self.__fetch('collectors', self.__api.get_collector_details)
+
+    def __return_score(self, value):
+        """
+            Analyze the textual answer and retrieve the value for score
+        """
+        return parse_score(value)
 
     def __create_question_type_list(self):
         """
             build the question type list
         """
-        question_data = self.__api.get_survey(self.__survey_id)
+        question_data = self.__get_survey()
         questions = {}
         for page in question_data['pages']:
             for question in page['questions']:
@@ -331,31 +591,41 @@ class SurveyProcessor():
         """
             Strip HTML tags
         """
-        TAG_RE = re.compile(r'<[^>]+>')
         for key in rec:
-            if rec[key] and type(rec[key]) is str:
-                rec[key] = TAG_RE.sub('', rec[key]).lstrip().rstrip()
+            value = rec[key]
+            if value and type(value) is str:
+                if '<' in value:
+                    value = TAG_RE.sub('', value)
+                rec[key] = value.strip()
 
         return rec
 
+    def __index_matrix_answers(self):
+        """
+            Index the matrix answers once: the topics of each question, in the order
+            they first appear
+        """
+        if self.__topics is not None:
+            return
+        topics = {}
+        for item in self.__answers:
+            if item.question_type == 'matrix' and item.topic != '':
+                topics.setdefault(item.question_id, {})[item.topic] = None
+        self.__topics = {question_id: list(names) for question_id, names in topics.items()}
+
     def __return_topics(self, question_id):
         """
             Return the list of topics for generating the padded answers
         """
-        topics = []
-        for question in self.__answers:
-            if question['question_id'] == question_id:
-                if question['topic'] != '' and question['topic'] not in topics:
-                    topics.append(question['topic'])
-        
-        return topics
+        self.__index_matrix_answers()
+        return self.__topics.get(question_id, [])
 
     def build_question_data(self):
         """
             build the question records
         """
         self.__questions = []
-        question_data = self.__api.get_survey(self.__survey_id)
+        question_data = self.__get_survey()
         question_label = 1
         for page in question_data['pages']:
             page_id = page['id']
@@ -378,8 +648,7 @@ class SurveyProcessor():
             build respondent records
         """
         self.__respondents = []
-        respondent_list = self.__api.get_survey_data(self.__survey_id)
-        for respondent in respondent_list:
+        for respondent in self.__iter_survey_data():
             record = {
                 "survey_id": self.__survey_id,
                 "respondent_id": respondent['id']
@@ -397,15 +666,25 @@ class SurveyProcessor():
     def build_answer_data(self):
         """
             build answer records
+            The processor keeps them as AnswerRecord and returns them as dicts
         """
-        self.__answers = []
-        questions = self.__create_question_type_list()
-        raw_data = self.__api.get_survey_data(self.__survey_id)
-        
-        with open('raw_data.json', 'w') as fo:
-            fo.write(str(raw_data))
+        self.__answers = list(self.__iter_answer_records())
+        self.__topics = None
+        return [record.to_dict() for record in self.__answers]
 
-        for answer in raw_data:
+    def iter_answer_data(self):
+        """
+            yield answer records, as dicts, as the responses are read
+        """
+        for record in self.__iter_answer_records():
+            yield record.to_dict()
+
+    def __iter_answer_records(self):
+        """
+            yield an AnswerRecord per answer as the responses are read
+        """
+        questions = self.__create_question_type_list()
+        for answer in self.__iter_survey_data():
             response_id = answer['id']
             for page in answer['pages']:
                 page_id = page['id']
@@ -413,137 +692,95 @@ class SurveyProcessor():
                     question_id = question['id']
                     if questions[question_id]['family'] not in ['presentation']:
                         for idx, item in enumerate(question['answers']):
-                            record = {
-                                "survey_id": self.__survey_id,
-                                "page_id": page_id,
-                                "respondent_id": response_id,
-                                "question_id": question_id,
-                                "question_type": questions[question_id]['family'],
-                                "answer": None,
-                                "topic": None,
-                                "score": 0
-                            }
+                            record = AnswerRecord(self.__survey_id, page_id, response_id,
+                                                  question_id, questions[question_id]['family'])
                             if questions[question_id]['family'] == "open_ended":
-                                record['answer'] = item['text']
+                                record.answer = item['text']
                                 if 'row_id' in item:
                                     if len(questions[question_id]['choices']) > 0:
-                                        record['topic'] = questions[question_id]['choices'][item['row_id']]['text']
+                                        record.topic = questions[question_id]['choices'][item['row_id']]['text']
                                     else:
                                         if idx == 0:
-                                            record['topic'] = "X"
+                                            record.topic = "X"
                                         else:
-                                            record['topic'] = "Y"
+                                            record.topic = "Y"
                                 else:
-                                    record['topic'] = "Open Ended"
+                                    record.topic = "Open Ended"
 
                             elif questions[question_id]['family'] in ["multiple_choice",
                                                                     "single_choice"]:
                                 if 'choice_id' not in item:
-                                    record['topic'] = 'Open Ended'
-                                    record['answer'] = item['text']
+                                    record.topic = 'Open Ended'
+                                    record.answer = item['text']
                                 else:
-                                    record['answer'] = questions[question_id]['choices'][item['choice_id']]
-                                    record['score'] = self.__return_score(questions[question_id]['choices'][item['choice_id']])
+                                    record.answer = questions[question_id]['choices'][item['choice_id']]
+                                    record.score = self.__return_score(questions[question_id]['choices'][item['choice_id']])
 
                             elif questions[question_id]['family'] == "matrix":
                                 if 'row_id' not in item:
-                                    record['topic'] = 'Open Ended'
-                                    record['answer'] = item['text']
-                                    record['question_type'] = "open_ended"
+                                    record.topic = 'Open Ended'
+                                    record.answer = item['text']
+                                    record.question_type = "open_ended"
                                 else:
-                                    record['topic'] = questions[question_id]['choices'][item['row_id']]['text']
-                                    record['answer'] = questions[question_id]['choices'][item['row_id']]['data'][item['choice_id']]
-                                    record['score'] = self.__return_score(questions[question_id]['choices'][item['row_id']]['data'][item['choice_id']])
+                                    record.topic = questions[question_id]['choices'][item['row_id']]['text']
+                                    record.answer = questions[question_id]['choices'][item['row_id']]['data'][item['choice_id']]
+                                    record.score = self.__return_score(questions[question_id]['choices'][item['row_id']]['data'][item['choice_id']])
 
-                            self.__answers.append(self.__clean_html(record))
+                            yield self.__clean_html(record)
 
-        return self.__answers
+    def __question_lookup(self, key_data):
+        """
+            Index the selected questions: returns the page_id -> set of question ids
+            index and the question_id -> question label lookup
+        """
+        keys = {page_id: set(question_ids) for page_id, question_ids in key_data.items()}
+        qst_lookup = {}
+        for item in self.__questions:
+            if item['question_id'] in keys.get(item['page_id'], ()):
+                qst_lookup[item['question_id']] = item['question_label']
+
+        return keys, qst_lookup
 
     def transpose_questions(self, key_data, use_topic=False, use_score=False):
         """
             Based on configuration, it build a list of dictionaries that contains the profile
             questions for the survey as columns
         """
+        keys, qst_lookup = self.__question_lookup(key_data)
+        labels = list(qst_lookup.values())
         raw_data = {}
-        qst_lookup = {}
-        for item in self.__questions:
-            if (item['page_id'] in key_data.keys() and
-                    item['question_id'] in key_data[item['page_id']]):
-                qst_lookup[item['question_id']] = item['question_label']
-
+        multiple = []
         for item in self.__answers:
-            if (item['page_id'] in key_data.keys() and
-                    item['question_id'] in key_data[item['page_id']] and
-                    (item['question_type'] != 'open_ended' and item['topic'] != 'Open Ended')):
-                if item['respondent_id'] not in raw_data:
-                    raw_data[item['respondent_id']] = {}
-                    if not use_topic:
-                        for key in qst_lookup.keys():
-                            raw_data[item['respondent_id']][qst_lookup[key]] = ''
-                    
-                if use_topic:
-                    if item['topic'] not in raw_data[item['respondent_id']]:
-                        raw_data[item['respondent_id']][item['topic']] = {}
-                        for key in qst_lookup.keys():
-                            if use_topic:
-                                raw_data[item['respondent_id']][item['topic']][qst_lookup[key]] = 0
-                            else:
-                                raw_data[item['respondent_id']][qst_lookup[key]] = 0
-                if use_score:
-                    if use_topic:
-                        raw_data[item['respondent_id']][item['topic']][qst_lookup[item['question_id']]] = item['score'] or ""
-                    else:
-                        raw_data[item['respondent_id']][qst_lookup[item['question_id']]] = item['score'] or ""
-                else:
-                    if use_topic:
-                        if item['topic'] != 'Open Ended':
-                            raw_data[item['respondent_id']][item['topic']][qst_lookup[item['question_id']]] = item['answer'] or ""
-                        else:
-                            raw_data[item['respondent_id']]['Other'][qst_lookup[item['question_id']]] = 0
-                    else:
-                        if item['topic'] != 'Open Ended':
-                            #raw_data[item['respondent_id']][qst_lookup[item['question_id']]] = item['answer'] or ""
-                            if len(raw_data[item['respondent_id']][qst_lookup[item['question_id']]]) == 0: 
-                                raw_data[item['respondent_id']][qst_lookup[item['question_id']]] = item['answer']
-                            else:
-                                raw_data[item['respondent_id']][qst_lookup[item['question_id']]] += '#' + item['answer']
-                        else:
-                            raw_data[item['respondent_id']][qst_lookup[item['question_id']]] = "Other"
-
-            elif (item['page_id'] in key_data.keys() and
-                    item['question_id'] in key_data[item['page_id']] and
-                    item['question_type'] == 'open_ended' and 
-                    item['topic'] != "Open Ended"):
-                if item['respondent_id'] not in raw_data:
-                    raw_data[item['respondent_id']] = {}
-                    if not use_topic:
-                        for key in qst_lookup.keys():
-                            raw_data[item['respondent_id']][qst_lookup[key]] = ''
-                    
-                if use_topic:
-                    if item['topic'] not in raw_data[item['respondent_id']]:
-                        raw_data[item['respondent_id']][item['topic']] = {}
-                        for key in qst_lookup.keys():
-                            if use_topic:
-                                raw_data[item['respondent_id']][item['topic']][qst_lookup[key]] = 0
-                            else:
-                                raw_data[item['respondent_id']][qst_lookup[key]] = 0
-                if use_score:
-                    if use_topic:
-                        raw_data[item['respondent_id']][item['topic']][qst_lookup[item['question_id']]] = item['score'] or ""
-                    else:
-                        raw_data[item['respondent_id']][qst_lookup[item['question_id']]] = item['score'] or ""
-                else:
-                    if use_topic:
-                        if item['topic'] != 'Open Ended':
-                            raw_data[item['respondent_id']][item['topic']][qst_lookup[item['question_id']]] = item['answer'] or ""
-                        else:
-                            raw_data[item['respondent_id']]['Other'][qst_lookup[item['question_id']]] = item['answer'] or ""
-                    else:
-                        if item['topic'] != 'Open Ended':
-                            raw_data[item['respondent_id']][qst_lookup[item['question_id']]] = item['answer'] or ""
-                        else:
-                            raw_data[item['respondent_id']][qst_lookup[item['question_id']]] = "Other"
+            if (item.topic == 'Open Ended' or
+                    item.question_id not in keys.get(item.page_id, ())):
+                continue
+
+            respondent_id = item.respondent_id
+            label = qst_lookup[item.question_id]
+            row = raw_data.get(respondent_id)
+            if row is None:
+                row = raw_data[respondent_id] = {} if use_topic else dict.fromkeys(labels, '')
+            if use_topic:
+                topic_row = row.get(item.topic)
+                if topic_row is None:
+                    topic_row = row[item.topic] = dict.fromkeys(labels, 0)
+                row = topic_row
+
+            if use_score:
+                row[label] = item.score or ""
+            elif use_topic or item.question_type == 'open_ended':
+                row[label] = item.answer or ""
+            else:
+                # multiple choice answers are joined with '#' once all answers are read
+                parts = row[label]
+                if isinstance(parts, list):
+                    parts.append(item.answer)
+                elif item.answer:
+                    row[label] = [item.answer]
+                    multiple.append((row, label))
+
+        for row, label in multiple:
+            row[label] = '#'.join(row[label])
 
         return_value = []
         for key in raw_data:
@@ -563,24 +800,15 @@ class SurveyProcessor():
         return return_value
 
     def expected_preferred(self, key_data, use_topic, use_score):
+        keys, qst_lookup = self.__question_lookup(key_data)
+        field = 'score' if use_score else 'answer'
         raw_data = {}
-        qst_lookup = {}
-        for item in self.__questions:
-            if (item['page_id'] in key_data.keys() and
-                    item['question_id'] in key_data[item['page_id']]):
-                qst_lookup[item['question_id']] = item['question_label']
-
         for item in self.__answers:
-            if (item['page_id'] in key_data.keys() and
-                    item['question_id'] in key_data[item['page_id']]):
-                if item['respondent_id'] not in raw_data:
-                    raw_data[item['respondent_id']] = {}
-
-                if use_score:
-                    raw_data[item["respondent_id"]][qst_lookup[item["question_id"]] + item['topic']] = item['score']
-                else:
-                    raw_data[item["respondent_id"]][qst_lookup[item["question_id"]] + item['topic']] = item['answer']
-
+            if item.question_id in keys.get(item.page_id, ()):
+                row = raw_data.get(item.respondent_id)
+                if row is None:
+                    row = raw_data[item.respondent_id] = {}
+                row[qst_lookup[item.question_id] + item.topic] = getattr(item, field)
 
         return_value = []
         for key in raw_data:
@@ -611,55 +839,60 @@ class SurveyProcessor():
             answers = []
             line_count = 0
             for line in self.__answers:
-                if line['question_type'] == 'open_ended':
+                if line.question_type == 'open_ended':
                     line_count += 1
 
-                    d_line = self.__decontract(line['answer'].lower())
+                    d_line = self.__decontract(line.answer.lower())
 
                     np_extractor = NPExtractor(d_line)
                     results = np_extractor.extract()
                     for word in results:
                         if word not in self.PUNCTUATION:
-                            data = {'survey_id': self.__survey_id,
-                                    'page_id': line['page_id'],
-                                    'respondent_id': line['respondent_id'],
-                                    'question_id': line['question_id'],
-                                    'question_type': line['question_type'],
-                                    'answer': word
-                                   }
-                            answers.append(data)
+                            data = OpenEndedRecord(self.__survey_id, line.page_id,
+                                                   line.respondent_id, line.question_id,
+                                                   line.question_type, word)
+                            answers.append(data.to_dict())
         except:
             answers = None
             print(traceback.format_exc())
         return answers
 
-    def build_sa_open_ended(self):
+    def build_sa_open_ended(self, workers=None):
         """
             Build the open ended dictionary with sentiment analysis
+            Answers are analysed once per distinct normalized text, using the sentiment
+            cache and, when workers is given, a process pool for the new texts
         """
         try:
             answers = []
-            line_count = 0
-            for line in self.__answers:
-                if line['question_type'] == 'open_ended':
-                    line_count += 1
+            lines = [(line, " ".join(line.answer.lower().split()))
+                     for line in self.__answers if line.question_type == 'open_ended']
 
-                    d_line = self.__decontract(line['answer'].lower())
-                    results = textblob.TextBlob(d_line)
-                    for item in results.sentences:
-                        pol = item.polarity
-                        sub = item.subjectivity
-
-                        data = {'survey_id': self.__survey_id,
-                                'page_id': line['page_id'],
-                                'respondent_id': line['respondent_id'],
-                                'question_id': line['question_id'],
-                                'question_type': line['question_type'],
-                                'answer': item,
-                                'polarity': pol,
-                                'subjectivity': sub
-                            }
-                        answers.append(data)
+            results = {}
+            missing = []
+            for _, text in lines:
+                if text not in results:
+                    results[text] = self.__sentiment_cache.get(text)
+                    if results[text] is None:
+                        missing.append(text)
+
+            decontracted = [self.__decontract(text) for text in missing]
+            if workers and len(missing) > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    computed = list(executor.map(sentence_sentiment, decontracted,
+                                                 chunksize=max(1, len(missing) // (workers * 4))))
+            else:
+                computed = [sentence_sentiment(text) for text in decontracted]
+            for text, sentences in zip(missing, computed):
+                self.__sentiment_cache.set(text, sentences)
+                results[text] = sentences
+
+            for line, text in lines:
+                for sentence, pol, sub in results[text]:
+                    data = SentimentRecord(self.__survey_id, line.page_id,
+                                           line.respondent_id, line.question_id,
+                                           line.question_type, sentence, pol, sub)
+                    answers.append(data.to_dict())
 
         except Exception as generic_exception:
             answers = None
@@ -667,39 +900,20 @@ class SurveyProcessor():
 
     def build_padded_answers(self):
         """
-            Build padded answers
+            Build padded answers: a neutral answer per topic of each matrix
+            question, for the first respondent
         """
         try:
             answers = []
-            line_count = 0
             for line in self.__questions:
                 if line['question_type'] == 'matrix':
                     topics = self.__return_topics(line['question_id'])
-                    for resp in self.__respondents:
-                        if len(topics) <= 0:
-                            data = {'survey_id': self.__survey_id,
-                                    'page_id': line['page_id'],
-                                    'respondent_id': resp['respondent_id'],
-                                    'question_id': line['question_id'],
-                                    'question_type': line['question_type'],
-                                    'answer': 0,
-                                    'topic': '',
-                                    'score': 0.5
-                            }
-                            answers.append(data)
-                        else:
-                            for topic in topics:
-                                data = {'survey_id': self.__survey_id,
-                                        'page_id': line['page_id'],
-                                        'respondent_id': resp['respondent_id'],
-                                        'question_id': line['question_id'],
-                                        'question_type': line['question_type'],
-                                        'answer': 0,
-                                        'topic': '',
-                                        'score': 0.5
-                                }
-                                answers.append(data)
-                        break
+                    for resp in self.__respondents[:1]:
+                        for _ in topics or ['']:
+                            data = AnswerRecord(self.__survey_id, line['page_id'],
+                                                resp['respondent_id'], line['question_id'],
+                                                line['question_type'], 0, '', 0.5)
+                            answers.append(data.to_dict())
 
         except Exception as generic_exception:
             answers = None
@@ -710,7 +924,7 @@ class SurveyProcessor():
             build collectors records
         """
         self.__collectors = []
-        collector_list = self.__api.get_collector_details(self.__survey_id)
+        collector_list = self.__get_collectors()
         for item in collector_list:
             record = {
                 "survey_id": self.__survey_id,
@@ -721,19 +935,119 @@ class SurveyProcessor():
 
         return self.__collectors
 
-    def breakdown_multiple_answers(self, questions, raw_data):
+    def iter_multiple_answers(self, questions, raw_data):
+        """
+            Yield the rows with the multiple choice answers broken down in different
+            lines, one combination of answers at a time
+        """
+        for row in raw_data:
+            values = [enumerate(row[item].split("#"), 1) for item in questions]
+            for combination in itertools.product(*values):
+                line = row.copy()
+                for item, (cnt, val) in zip(questions, combination):
+                    line[item] = val
+                    line['cnt'] = cnt
+                yield line
+
+    def iter_tidy_answers(self, questions, raw_data):
+        """
+            Yield one line per row, question and answer instead of every combination
+            of the answers. The question goes to 'question_label' and the answer to 'answer'
+        """
+        for row in raw_data:
+            base = {key: value for key, value in row.items() if key not in questions}
+            for item in questions:
+                for cnt, val in enumerate(row[item].split("#"), 1):
+                    line = base.copy()
+                    line['question_label'] = item
+                    line['answer'] = val
+                    line['cnt'] = cnt
+                    yield line
+
+    def breakdown_multiple_answers(self, questions, raw_data, tidy=False):
         """Breakdown a multiple choice answers in different lines"""
-        return_data = []
-        mid_data = []
-        for idx, item in enumerate(questions):
-            for row in raw_data:
-                values = row[item].split("#")
-                for cnt, val in enumerate(values):
-                    row[item] = val
-                    row['cnt'] = cnt+1
-                    return_data.append(row.copy())
-
-            raw_data = return_data.copy()
-            return_data = []
-            
-        return raw_data
\ No newline at end of file
+        if tidy:
+            return list(self.iter_tidy_answers(questions, raw_data))
+        return list(self.iter_multiple_answers(questions, raw_data))
+
+# -------------------------------------------------------------------------------------------------
+# Batch processing of several surveys
+# -------------------------------------------------------------------------------------------------
+class SurveyBatchProcessor():
+    """
+        Process a list of surveys concurrently, fetching each survey payload only once
+    """
+
+    BUILDERS = {
+        "questions": "build_question_data",
+        "respondents": "build_respondent_data",
+        "answers": "build_answer_data",
+        "collectors": "build_collectors_data",
+        "open_ended": "build_open_ended_data",
+        "sentiment": "build_sa_open_ended",
+        "padded": "build_padded_answers"
+    }
+    STAGES = ["questions", "respondents", "answers", "collectors"]
+    # stages that read the records built by earlier stages
+    REQUIRES = {
+        "open_ended": ["answers"],
+        "sentiment": ["answers"],
+        "padded": ["questions", "respondents", "answers"]
+    }
+
+    __survey_ids = None
+    __access_token = None
+    __proxy = None
+    __cache = None
+    __workers = None
+    __stages = None
+
+    def __init__(self, survey_ids, access_token, proxy=None, workers=4, stages=None,
+                 cache=None):
+        """
+            Class constructor
+            stages is an ordered list of BUILDERS keys. A stage must come after the
+            stages it requires (REQUIRES): open_ended and sentiment after "answers",
+            padded after "questions", "respondents" and "answers"
+        """
+        self.__survey_ids = list(survey_ids)
+        self.__access_token = access_token
+        self.__proxy = proxy
+        self.__cache = cache
+        self.__workers = workers
+        self.__stages = stages or self.STAGES
+        for idx, stage in enumerate(self.__stages):
+            if stage not in self.BUILDERS:
+                raise ValueError("Unknown stage: %s" % stage)
+            for required in self.REQUIRES.get(stage, []):
+                if required not in self.__stages[:idx]:
+                    raise ValueError("Stage %s must come after %s" % (stage, required))
+
+    def __process_survey(self, survey_id):
+        """
+            Fetch the survey details and bulk responses once and run every stage over them
+        """
+        processor = SurveyProcessor(survey_id, self.__access_token, self.__proxy,
+                                    cache=self.__cache)
+        records = []
+        for stage in self.__stages:
+            for record in getattr(processor, self.BUILDERS[stage])() or []:
+                records.append((survey_id, stage, record))
+        return records
+
+    def process(self):
+        """
+            Yield (survey_id, stage, record) tuples as each survey is completed
+        """
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            futures = {executor.submit(self.__process_survey, survey_id): survey_id
+                       for survey_id in self.__survey_ids}
+            for future in as_completed(futures):
+                try:
+                    records = future.result()
+                except Exception:
+                    print("Survey %s failed" % futures[future])
+                    print(traceback.format_exc())
+                    continue
+                for record in records:
+                    yield record
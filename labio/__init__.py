@@ -2,4 +2,11 @@
 '''Initializes the labio module'''
 from labio.config import config
 from labio.logging import pcf_logger
-from labio import database as db
\ No newline at end of file
+
+def __getattr__(name):
+    ''' Imports labio.db (SQLAlchemy and the models base) on first use '''
+    if name == 'db':
+        from labio import database as db
+        globals()['db'] = db
+        return db
+    raise AttributeError("module 'labio' has no attribute %r" % name)
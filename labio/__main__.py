@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+'''Command line tasks of the labio module: python -m labio migrate'''
+import sys
+from labio import mockserver
+
+def migrate(argv):
+    ''' Upgrades the database to the latest version '''
+    from labio import database
+    database.migrate()
+    return 0
+
+# {name: function called with the remaining arguments}
+COMMANDS = {
+    'migrate': migrate,
+    'mockserver': mockserver.main
+}
+
+def main(argv):
+    ''' Runs the command named in the arguments '''
+    if not argv or argv[0] not in COMMANDS:
+        print('usage: python -m labio {%s} ...' % ','.join(sorted(COMMANDS)))
+        return 2
+    return COMMANDS[argv[0]](argv[1:])
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
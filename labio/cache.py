@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+'''This module contains the caches used by the text processing stages'''
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+class LRUCache():
+    ''' Thread safe in-memory cache that keeps the most recently used entries '''
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        ''' Return the cached value, or None when the key is not cached '''
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        ''' Store the value, discarding the least recently used entry when full '''
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        ''' Remove every entry '''
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class SQLiteCache():
+    ''' Persistent cache that stores JSON encoded values in a SQLite table '''
+
+    def __init__(self, path, table='cache'):
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS %s (key TEXT PRIMARY KEY, value TEXT)' % self.table)
+
+    def _connection(self):
+        ''' Return the connection of the current thread '''
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        ''' Return the cached value, or None when the key is not cached '''
+        row = self._connection().execute(
+            'SELECT value FROM %s WHERE key = ?' % self.table, (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key, value):
+        ''' Store the value '''
+        self._connection().execute(
+            'INSERT OR REPLACE INTO %s (key, value) VALUES (?, ?)' % self.table,
+            (key, json.dumps(value)))
+
+    def clear(self):
+        ''' Remove every entry '''
+        self._connection().execute('DELETE FROM %s' % self.table)
+
+class Cache():
+    ''' In-memory LRU cache backed by an optional persistent SQLite tier '''
+
+    def __init__(self, maxsize=10000, path=None, table='cache'):
+        self.memory = LRUCache(maxsize)
+        self.persistent = SQLiteCache(path, table) if path else None
+
+    def get(self, key):
+        ''' Return the cached value from memory, then from the persistent tier '''
+        value = self.memory.get(key)
+        if value is None and self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        ''' Store the value in both tiers '''
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value)
+
+    def clear(self):
+        ''' Remove every entry from both tiers '''
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
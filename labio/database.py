@@ -1,28 +1,87 @@
 # -*- coding: utf-8 -*-
 '''This module contains the database singleton.'''
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, func, select
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.util import ThreadLocalRegistry
 from sqlalchemy.ext.declarative import as_declarative
 from labio.config import config
-from labio.serializer import setup_serializer
 
-def init():
-    ''' Runs all necessary database setup operations '''
+# head of alembic/versions, update it with every new migration
+SCHEMA_REVISION = 'f5d2b8a1c470'
+
+def init(settings=None):
+    ''' Runs all necessary database setup operations. settings replaces labio.config '''
+    global config
+    if settings is not None:
+        config = settings
     _connect()
-    _upgrade_db()
+    # alembic is only loaded when the database is behind the package
+    if _current_revision() != SCHEMA_REVISION:
+        _upgrade_db()
+    from labio.serializer import setup_serializer
     setup_serializer(Base)
 
+def migrate():
+    ''' Connects and upgrades the database to the latest version '''
+    _connect()
+    _upgrade_db()
+
 def _connect():
-    ''' Connects to the database '''
-    global engine
+    ''' Connects to the database, and to the read replica when DB_REPLICA_SERVER is set '''
+    global engine, read_engine
     
     if engine is not None:
-        Base.session.remove()
+        remove_sessions()
+        if read_engine is not engine:
+            read_engine.dispose()
         engine.dispose()
 
-    engine = create_engine(config.DB_SERVER, convert_unicode=True)
+    engine = _create_engine(config.DB_SERVER)
+    read_engine = _create_engine(config.DB_REPLICA_SERVER) if config.DB_REPLICA_SERVER else engine
     Base.session.configure(bind=engine)
+    Base.read_session.configure(bind=read_engine)
+
+def _create_engine(server):
+    ''' Creates the engine of a database url with the pool or pragmas of its backend '''
+    url = make_url(server)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # an in-memory database lives as long as its only connection
+            sqlite_engine = create_engine(url, convert_unicode=True, poolclass=StaticPool,
+                                          connect_args={'timeout': config.SQLITE_TIMEOUT,
+                                                        'check_same_thread': False})
+        else:
+            sqlite_engine = create_engine(url, convert_unicode=True,
+                                          connect_args={'timeout': config.SQLITE_TIMEOUT})
+        event.listen(sqlite_engine, 'connect', _sqlite_pragmas)
+        return sqlite_engine
+    return create_engine(url, convert_unicode=True,
+                         pool_size=config.DB_POOL_SIZE,
+                         max_overflow=config.DB_MAX_OVERFLOW,
+                         pool_recycle=config.DB_POOL_RECYCLE,
+                         pool_pre_ping=True)
+
+def truncated(column, length=None):
+    ''' Selects the first LIST_TEXT_LENGTH characters of a text column, keeping its name '''
+    return func.substr(column, 1, length or config.LIST_TEXT_LENGTH).label(column.key)
+
+def remove_sessions():
+    ''' Closes the sessions of the current thread, releasing their connections and
+        the objects they loaded. Called at the end of every web request '''
+    Base.session.remove()
+    Base.read_session.remove()
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    ''' Lets readers run while a writer holds the database '''
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA mmap_size=%d' % config.SQLITE_MMAP_SIZE)
+    cursor.execute('PRAGMA cache_size=%d' % config.SQLITE_CACHE_SIZE)
+    cursor.close()
 
 def get_metadata():
     '''Import all modules that define models here!
@@ -37,13 +96,43 @@ def get_metadata():
     from models.models import Service
     from models.models import Endpoints_List
     from models.models import Endpoint
+    from models.models import Endpoint_Parameter
+    from models.models import Service_Deployment
+    from models.models import Service_Variant
     from models.models import Tag
     from models.models import Similar
     from models.models import Logs
     from models.models import Details
     from models.models import Filters
+    from models.models import Filters_Hash
+    from models.models import Term_Stat
+    from models.models import Service_Term
+    from models.models import Pipeline_State
+    from models.models import Survey_Question
+    from models.models import Survey_Respondent
+    from models.models import Survey_Answer
+    from models.models import Survey_Open_Ended
+    from models.models import Survey_Sentiment
+    from models.models import Survey_Collector
     return Base.metadata
 
+def dispose():
+    ''' Drops the pooled connections and the sessions of the current process.
+        Called in every web worker after the fork, once the worker patched threading '''
+    Base.session.registry = ThreadLocalRegistry(Base.session.session_factory)
+    Base.read_session.registry = ThreadLocalRegistry(Base.read_session.session_factory)
+    if engine is not None:
+        if read_engine is not engine:
+            read_engine.dispose()
+        engine.dispose()
+
+def _current_revision():
+    '''Returns the revision stamped in the database, None when it was never migrated'''
+    try:
+        return engine.execute('SELECT version_num FROM alembic_version').scalar()
+    except exc.DBAPIError:
+        return None
+
 def _upgrade_db():
     '''Invokes alembic to bring the database to the latest version'''
     from alembic.config import Config
@@ -54,6 +143,7 @@ def _upgrade_db():
     command.upgrade(alembic_cfg, "head")
 
 engine = None
+read_engine = None
 
 @as_declarative()
 class Base():
@@ -68,6 +158,16 @@ class Base():
                                 )
     query: scoped_session.query_property = session.query_property()
 
+    # session of the web pages: it runs the listing() selects, on the read replica
+    # when one is configured
+    read_session: scoped_session = scoped_session(
+                                    sessionmaker(
+                                        autocommit=False,
+                                        autoflush=False,
+                                        bind=None
+                                    )
+                                )
+
     def add(self):
         ''' Insert this object into the database '''
         self.query.session.add(self)
@@ -80,6 +180,32 @@ class Base():
         ''' Deletes this object from the database '''
         self.query.session.delete(self)
 
+    @classmethod
+    def bulk_insert(cls, rows, batch_size=5000):
+        ''' Insert an iterable of dicts in batches of executemany statements.
+            Keys that are not columns of the table are ignored '''
+        columns = set(cls.__table__.columns.keys())
+        connection = cls.session.connection()
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append({key: row[key] for key in row if key in columns})
+            if len(batch) >= batch_size:
+                connection.execute(cls.__table__.insert(), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            connection.execute(cls.__table__.insert(), batch)
+            count += len(batch)
+        return count
+
+    @classmethod
+    def listing(cls, *columns):
+        ''' Select the given columns (all of them by default) of every row through the read
+            session. Rows are light named tuples instead of tracked objects '''
+        statement = select(list(columns or cls.__table__.columns))
+        return cls.read_session.execute(statement.execution_options(stream_results=True))
+
     @classmethod
     def list_dumps(cls, data: list, *args, **kwargs):
         ''' Dump this list of obj as a string in JSON format '''
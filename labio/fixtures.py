@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+'''Synthetic SurveyMonkey payloads shared by the tests and the benchmarks'''
+
+def synthetic_survey(respondents=3):
+    ''' Build survey details and bulk responses shaped like the SurveyMonkey api payloads '''
+    details = {'id': 'S1', 'date_modified': '2019-06-24T00:00:00', 'pages': [{'id': 'P1', 'questions': [
+        {'id': 'Q1', 'family': 'single_choice', 'headings': [{'heading': '<b>Age</b>'}],
+         'answers': {'choices': [{'id': 'C1', 'text': '1 - Young'}, {'id': 'C2', 'text': '2 - Old'}]}},
+        {'id': 'Q2', 'family': 'multiple_choice', 'headings': [{'heading': 'Tools'}],
+         'answers': {'choices': [{'id': 'M1', 'text': 'Python'}, {'id': 'M2', 'text': 'R'}]}},
+        {'id': 'Q3', 'family': 'matrix', 'headings': [{'heading': 'Rate'}],
+         'answers': {'rows': [{'id': 'R1', 'text': 'Speed'}, {'id': 'R2', 'text': 'Price'}],
+                     'choices': [{'id': 'X1', 'text': '1 star'}, {'id': 'X5', 'text': '5 stars'}]}},
+        {'id': 'Q4', 'family': 'open_ended', 'headings': [{'heading': 'Comments'}]},
+        {'id': 'Q5', 'family': 'presentation', 'headings': [{'heading': 'Thanks'}]}]}]}
+    responses = []
+    for idx in range(respondents):
+        questions = [
+            {'id': 'Q1', 'answers': [{'choice_id': 'C1' if idx % 2 else 'C2'}]},
+            {'id': 'Q2', 'answers': [{'choice_id': 'M1'}, {'choice_id': 'M2'}][:idx % 2 + 1]},
+            {'id': 'Q3', 'answers': [{'row_id': 'R1', 'choice_id': 'X5'},
+                                     {'row_id': 'R2', 'choice_id': 'X1'}][:idx % 2 + 1]},
+            {'id': 'Q4', 'answers': [{'text': 'The <i>service</i> is good. It is fast!'}]}]
+        responses.append({'id': 'A%d' % idx, 'total_time': 10, 'date_created': '2019-06-24',
+                          'date_modified': '2019-06-24', 'ip_address': '127.0.0.1',
+                          'collector_id': 'CL1', 'response_status': 'completed',
+                          'pages': [{'id': 'P1', 'questions': questions}]})
+    return details, responses
+
+def synthetic_matrix_survey(respondents=1000, questions=10, rows=5, choices=5):
+    ''' Build a large survey of matrix questions where every respondent skips one row '''
+    details = {'id': 'S1', 'date_modified': '2019-06-24T00:00:00', 'pages': [{'id': 'P1', 'questions': [
+        {'id': 'Q%d' % qst, 'family': 'matrix', 'headings': [{'heading': 'Matrix %d' % qst}],
+         'answers': {'rows': [{'id': 'R%d' % row, 'text': 'Row %d' % row} for row in range(rows)],
+                     'choices': [{'id': 'X%d' % choice, 'text': '%d points' % choice}
+                                 for choice in range(choices)]}}
+        for qst in range(questions)]}]}
+    responses = []
+    for idx in range(respondents):
+        questions_data = [
+            {'id': 'Q%d' % qst, 'answers': [{'row_id': 'R%d' % row, 'choice_id': 'X%d' % ((idx + row) % choices)}
+                                            for row in range(rows) if row != idx % rows]}
+            for qst in range(questions)]
+        responses.append({'id': 'A%d' % idx, 'total_time': 10, 'date_created': '2019-06-24',
+                          'date_modified': '2019-06-24', 'ip_address': '127.0.0.1',
+                          'collector_id': 'CL1', 'response_status': 'completed',
+                          'pages': [{'id': 'P1', 'questions': questions_data}]})
+    return details, responses
@@ -6,6 +6,7 @@ class PCFFormatter(Formatter):
     ''' Custom formatter to inject request information into  the log '''
     def format(self, record):
         try:
+            from flask import request
             record.url = '[{}] '.format(request.url)
             record.remote_addr = '[{}] '.format(request.remote_addr)
             record.username = '[{}] '.format(request.environ.get('username'))
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+'''Local HTTP server that answers the BioCatalogue and SurveyMonkey requests of the
+   harvest scripts for a synthetic catalogue of any size, with configurable latency,
+   error rate and page size. The payloads are rendered from the templates in mockdata/
+
+   python -m labio mockserver --services 100000 --latency 0.05 --error-rate 0.01
+   BIOCATALOGUE_URL=http://127.0.0.1:8080 python services_list.py'''
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, urlparse
+
+MOCKDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mockdata')
+
+WORDS = ['protein', 'sequence', 'alignment', 'genome', 'pathway', 'structure', 'database',
+         'annotation', 'expression', 'ontology', 'phylogeny', 'variant', 'metabolite',
+         'retrieval', 'search', 'blast', 'domain', 'motif', 'transcript', 'interaction']
+
+def load_template(*path):
+    ''' Read a payload template as a string.Template '''
+    with open(os.path.join(MOCKDATA, *path)) as fi:
+        return Template(fi.read().strip())
+
+class MockCatalogue():
+    ''' Deterministic synthetic catalogue: service ids 1..services, each with
+        endpoints_per_service (at most 1000) endpoints numbered service_id * 1000 + n '''
+
+    def __init__(self, services=100, endpoints_per_service=3, per_page=25, seed=1):
+        self.services = services
+        self.endpoints_per_service = endpoints_per_service
+        self.per_page = per_page
+        self.seed = seed
+        self.surveys = {}
+        self.templates = {name: load_template('biocatalogue', name) for name in os.listdir(
+            os.path.join(MOCKDATA, 'biocatalogue'))}
+        self.templates.update({'sm/' + name: load_template('surveymonkey', name) for name in os.listdir(
+            os.path.join(MOCKDATA, 'surveymonkey'))})
+
+    def words(self, key, count):
+        ''' Pseudo random words, always the same for the same key '''
+        rnd = random.Random('%s-%s' % (self.seed, key))
+        return [rnd.choice(WORDS) for _ in range(count)]
+
+    def fields(self, service_id, base):
+        return {'base': base, 'id': service_id, 'name': 'service%d' % service_id,
+                'description': ' '.join(self.words(service_id, 40))}
+
+    def render(self, template, **fields):
+        return self.templates[template].substitute(**fields)
+
+    def has_service(self, service_id):
+        return 1 <= service_id <= self.services
+
+    def has_endpoint(self, endpoint_id):
+        return (self.has_service(endpoint_id // 1000) and
+                endpoint_id % 1000 < self.endpoints_per_service)
+
+    def services_page(self, base, page, per_page=None):
+        per_page = per_page or self.per_page
+        pages = (self.services + per_page - 1) // per_page
+        first = (page - 1) * per_page + 1
+        ids = range(first, min(first + per_page, self.services + 1)) if page >= 1 else []
+        results = ', '.join(self.render('services_result.json', **self.fields(service_id, base))
+                            for service_id in ids)
+        return self.render('services.json', per_page=per_page, page=page, pages=pages,
+                           total=self.services, results=results)
+
+    def service(self, base, service_id):
+        return self.render('service.json', **self.fields(service_id, base))
+
+    def service_page(self, base, service_id):
+        tags = self.words('tag-%d' % service_id, 3)
+        return self.render('service.html', tag1=tags[0], tag2=tags[1], tag3=tags[2],
+                           **self.fields(service_id, base))
+
+    def endpoints_page(self, base, service_id):
+        entries = '\n'.join(self.render('service_endpoint_entry.html',
+                                        endpoint_id=service_id * 1000 + idx,
+                                        endpoint_name='get_%s' % word)
+                            for idx, word in enumerate(self.words('ep-%d' % service_id,
+                                                                  self.endpoints_per_service)))
+        return self.render('service_endpoint.html', entries=entries, **self.fields(service_id, base))
+
+    def rest_method(self, base, endpoint_id):
+        service_id = endpoint_id // 1000
+        fields = self.fields(service_id, base)
+        fields['description'] = ' '.join(self.words(endpoint_id, 20))
+        return self.render('rest_method.json', endpoint_id=endpoint_id,
+                           endpoint_name='get_%s' % self.words(endpoint_id, 1)[0],
+                           parameter=self.words('param-%d' % endpoint_id, 1)[0], **fields)
+
+    def add_survey(self, survey_id, details, responses):
+        ''' Serve a survey: the SurveyMonkey details and bulk responses payloads '''
+        self.surveys[survey_id] = (details, responses)
+
+    def survey(self, base, survey_id, resource):
+        details, responses = self.surveys[survey_id]
+        fields = {'base': base, 'survey_id': survey_id}
+        if resource == '':
+            questions = sum(len(page['questions']) for page in details['pages'])
+            return self.render('sm/survey_info.json', questions=questions,
+                               responses=len(responses), **fields)
+        if resource == '/details':
+            return json.dumps(details)
+        if resource == '/collectors':
+            return self.render('sm/collectors.json', **fields)
+        if resource == '/responses/bulk':
+            return self.render('sm/responses_bulk.json', data=json.dumps(responses),
+                               per_page=len(responses), total=len(responses), **fields)
+        return None
+
+ROUTES = [
+    (re.compile(r'^/services\.json$'), 'services'),
+    (re.compile(r'^/services/(\d+)\.json$'), 'service'),
+    (re.compile(r'^/services/(\d+)/service_endpoint$'), 'endpoints'),
+    (re.compile(r'^/services/(\d+)$'), 'service_page'),
+    (re.compile(r'^/rest_methods/(\d+)\.json$'), 'rest_method'),
+    (re.compile(r'^/v3/surveys/([^/]+)(.*)$'), 'survey')
+]
+
+class MockHandler(BaseHTTPRequestHandler):
+    ''' Dispatches the request paths to the catalogue of the server '''
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if self.failed():
+            self.send_error(503)
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        catalogue = server.catalogue
+        base = 'http://%s' % self.headers['Host'] if self.headers['Host'] else server.url
+        body, content_type = None, 'application/json'
+        for pattern, name in ROUTES:
+            match = pattern.match(url.path)
+            if match is None:
+                continue
+            if name == 'survey':
+                if match.group(1) in catalogue.surveys:
+                    body = catalogue.survey(base, match.group(1), match.group(2))
+                break
+            if name == 'services':
+                body = catalogue.services_page(base, int(query.get('page', ['1'])[0]),
+                                               int(query.get('per_page', ['0'])[0]))
+                break
+            item_id = int(match.group(1))
+            if name == 'rest_method':
+                if catalogue.has_endpoint(item_id):
+                    body = catalogue.rest_method(base, item_id)
+            elif catalogue.has_service(item_id):
+                if name == 'service':
+                    body = catalogue.service(base, item_id)
+                elif name == 'endpoints':
+                    body, content_type = catalogue.endpoints_page(base, item_id), 'text/html'
+                else:
+                    body, content_type = catalogue.service_page(base, item_id), 'text/html'
+            break
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def failed(self):
+        ''' Draw whether this response is one of the errors '''
+        server = self.server
+        if not server.error_rate:
+            return False
+        with server.lock:
+            return server.random.random() < server.error_rate
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+class MockServer():
+    ''' Runs the mock in a background thread. Every response is delayed by latency
+        seconds, and error_rate of them are 503 errors. port 0 picks a free port '''
+
+    def __init__(self, catalogue, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0,
+                 verbose=False):
+        self.httpd = ThreadingHTTPServer((host, port), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.catalogue = catalogue
+        self.httpd.url = 'http://%s:%d' % (host, self.httpd.server_address[1])
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self.httpd.random = random.Random(catalogue.seed)
+        self.httpd.lock = threading.Lock()
+        self.httpd.verbose = verbose
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return self.httpd.url
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def main(argv):
+    ''' Serve a synthetic catalogue until interrupted '''
+    parser = argparse.ArgumentParser(prog='python -m labio mockserver',
+                                     description='Serve a synthetic BioCatalogue')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--services', type=int, default=1000)
+    parser.add_argument('--endpoints', type=int, default=3, help='endpoints per service')
+    parser.add_argument('--per-page', type=int, default=25, help='services per page')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per response')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of the responses that fail with 503')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+    catalogue = MockCatalogue(args.services, args.endpoints, args.per_page, args.seed)
+    with MockServer(catalogue, args.host, args.port, args.latency, args.error_rate,
+                    args.verbose) as server:
+        print('serving %d services on %s' % (args.services, server.url))
+        print('BIOCATALOGUE_URL=%s' % server.url)
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+    return 0
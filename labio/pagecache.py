@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+'''This module caches the rendered pages of the web app until the catalogue changes'''
+import functools
+import gzip
+import hashlib
+
+from flask import Response, request
+
+from labio.cache import LRUCache
+from labio.versions import cached_version
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+class CachedPage():
+    ''' A rendered page, its strong ETag and its compressed bodies '''
+
+    __slots__ = ('body', 'etag', 'mimetype', '_encoded')
+
+    def __init__(self, body, mimetype='text/html'):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.mimetype = mimetype
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        ''' Return the body compressed with gzip or br, compressing it on the first call '''
+        body = self._encoded.get(encoding)
+        if body is None:
+            if encoding == 'br':
+                body = brotli.compress(self.body, quality=5)
+            else:
+                body = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self._encoded[encoding] = body
+        return body
+
+    def entity_tag(self, encoding):
+        ''' Every encoding is a different representation, with its own ETag '''
+        return self.etag if encoding is None else '%s-%s' % (self.etag, encoding)
+
+class PageCache():
+    ''' Rendered pages in a per process LRU, shared between the workers through an
+        optional redis server '''
+
+    def __init__(self, maxsize=64, client=None, ttl=86400):
+        self.memory = LRUCache(maxsize)
+        self.client = client
+        self.ttl = ttl
+
+    @classmethod
+    def from_config(cls, config):
+        ''' Use redis when REDIS_HOST is set and the client is installed '''
+        client = None
+        if config.REDIS_HOST and redis is not None:
+            client = redis.Redis(host=config.REDIS_HOST, port=int(config.REDIS_PORT or 6379),
+                                 password=config.REDIS_PWD)
+        return cls(config.PAGE_CACHE_SIZE, client, config.PAGE_CACHE_TTL)
+
+    def get(self, key):
+        ''' Return the cached page, or None '''
+        page = self.memory.get(key)
+        if page is None and self.client is not None:
+            try:
+                body = self.client.get('page:' + key)
+            except redis.RedisError:
+                body = None
+            if body is not None:
+                page = CachedPage(body)
+                self.memory.set(key, page)
+        return page
+
+    def set(self, key, body):
+        ''' Cache a rendered page. Returns the CachedPage '''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        page = CachedPage(body)
+        self.memory.set(key, page)
+        if self.client is not None:
+            try:
+                self.client.set('page:' + key, body, ex=self.ttl)
+            except redis.RedisError:
+                pass
+        return page
+
+def accepted_encoding(accept_encoding):
+    ''' Return the best compression the client accepts: br, gzip or None '''
+    accepted = set()
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        params = params.replace(' ', '')
+        try:
+            quality = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+def cached(page_cache, check_interval):
+    ''' Decorates a view that renders a page from the catalogue. The page is rendered once
+        per catalogue version and answered with 304 when the client has it already.
+        The view must not read the query string: it is not part of the key, so a random
+        query can not force a render or evict the cached pages '''
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = '%s:%s' % (cached_version(check_interval), request.path)
+            page = page_cache.get(key)
+            if page is None:
+                page = page_cache.set(key, view(*args, **kwargs))
+            encoding = accepted_encoding(request.headers.get('Accept-Encoding', ''))
+            etag = page.entity_tag(encoding)
+            headers = {'ETag': '"%s"' % etag,
+                       'Vary': 'Accept-Encoding',
+                       'Cache-Control': 'no-cache'}
+            if request.if_none_match.contains(etag):
+                return Response(status=304, headers=headers)
+            if encoding is None:
+                return Response(page.body, mimetype=page.mimetype, headers=headers)
+            headers['Content-Encoding'] = encoding
+            return Response(page.encoded(encoding), mimetype=page.mimetype, headers=headers)
+        return wrapper
+    return decorator
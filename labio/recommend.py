@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+'''This module recommends services and endpoints for a capability query'''
+import heapq
+import threading
+from collections import Counter, defaultdict
+
+from labio.config import config
+from labio.keywords import extract_keywords
+from labio.similarity import service_documents, tfidf_vectors, tokenize
+from labio.versions import cached_version, get_version
+
+def endpoint_documents():
+    ''' Return the words of the name, label, description and input parameters of every endpoint '''
+    from models.models import Endpoint, Endpoint_Parameter
+    docs = {}
+    for endpoint_id, name, label, description in Endpoint.session.query(
+            Endpoint.id, Endpoint.name, Endpoint.label, Endpoint.description):
+        docs[endpoint_id] = Counter(tokenize(' '.join(filter(None, (name, label, description)))))
+    for endpoint_id, name in Endpoint.session.query(Endpoint_Parameter.endpoint_id, Endpoint_Parameter.name):
+        if endpoint_id in docs and name:
+            docs[endpoint_id].update(tokenize(name))
+    return docs
+
+def query_features(text):
+    ''' Return the features of a query, built like the features of the services:
+        its words, the tags it may name and the keywords filter.py would extract '''
+    features = Counter(tokenize(text))
+    tags = set(features)
+    tags.add(text.strip().lower())
+    for keyword in extract_keywords(text):
+        features['kw:' + keyword] += 1
+        tags.add(keyword)
+    for tag in tags:
+        features['tag:' + tag] += 1
+    return features
+
+def _postings(vectors):
+    ''' Invert {doc_id: {feature: weight}} into {feature: ((doc_id, weight), ...)} '''
+    postings = defaultdict(list)
+    for doc_id, vector in vectors.items():
+        for feature, weight in vector.items():
+            postings[feature].append((doc_id, weight))
+    return {feature: tuple(items) for feature, items in postings.items()}
+
+def _rank(postings, features, limit):
+    ''' Return the (score, doc_id) pairs of the best documents for the query features '''
+    scores = defaultdict(float)
+    for feature, count in features.items():
+        for doc_id, weight in postings.get(feature, ()):
+            scores[doc_id] += count * weight
+    return heapq.nlargest(limit, ((score, doc_id) for doc_id, score in scores.items()))
+
+class RecommendIndex():
+    ''' Read only inverted index over the catalogue, built for one catalogue version '''
+
+    def __init__(self, version, services, endpoints, service_postings, endpoint_postings):
+        self.version = version
+        self.services = services
+        self.endpoints = endpoints
+        self.service_postings = service_postings
+        self.endpoint_postings = endpoint_postings
+
+    @classmethod
+    def build(cls, version=None):
+        ''' Load the index from the database '''
+        from models.models import Service, Endpoint
+        if version is None:
+            version = get_version()
+        session = Service.session
+        services = dict(session.query(Service.id, Service.name))
+        endpoints = {endpoint_id: (name, service_id) for endpoint_id, name, service_id in
+                     session.query(Endpoint.id, Endpoint.name, Endpoint.service_id)}
+        return cls(version, services, endpoints,
+                   _postings(tfidf_vectors(service_documents())),
+                   _postings(tfidf_vectors(endpoint_documents())))
+
+    def search(self, text, limit=10):
+        ''' Return the services and endpoints that best match the query, highest score first '''
+        features = query_features(text)
+        return {
+            'query': text,
+            'version': self.version,
+            'services': [{'id': service_id,
+                          'name': self.services.get(service_id),
+                          'score': round(score, 4)}
+                         for score, service_id in _rank(self.service_postings, features, limit)],
+            'endpoints': [{'id': endpoint_id,
+                           'name': self.endpoints[endpoint_id][0],
+                           'service_id': self.endpoints[endpoint_id][1],
+                           'score': round(score, 4)}
+                          for score, endpoint_id in _rank(self.endpoint_postings, features, limit)]
+        }
+
+_index = None
+_lock = threading.Lock()
+
+def get_index(check_interval=None):
+    ''' Return the index of this worker. It is loaded on the first call and reloaded when
+        the pipeline published a new catalogue version, checked every check_interval
+        seconds (CATALOGUE_CHECK_INTERVAL by default). Requests keep using the current
+        index while another thread reloads it '''
+    global _index
+    if check_interval is None:
+        check_interval = config.CATALOGUE_CHECK_INTERVAL
+    version = cached_version(check_interval)
+    if _index is not None and _index.version == version:
+        return _index
+    if not _lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        if _index is None or _index.version != version:
+            _index = RecommendIndex.build(version)
+        return _index
+    finally:
+        _lock.release()
+
+def recommend(text, limit=10, check_interval=None):
+    ''' Return the ranked services and endpoints for a capability query '''
+    return get_index(check_interval).search(text, limit)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+'''Compact record types for the survey data'''
+from collections.abc import Mapping
+from sys import intern
+
+class Record(Mapping):
+    ''' Base class for records that keep their fields in __slots__ instead of a dict.
+        Records can be read and updated like the dicts they replace '''
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.to_dict())
+
+    def to_dict(self):
+        ''' Return the record as a dict '''
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def copy(self):
+        ''' Return a dict copy of the record, as dict.copy would '''
+        return self.to_dict()
+
+class AnswerRecord(Record):
+    ''' One answer of a respondent to a question '''
+
+    __slots__ = ('survey_id', 'page_id', 'respondent_id', 'question_id', 'question_type',
+                 'answer', 'topic', 'score')
+
+    def __init__(self, survey_id, page_id, respondent_id, question_id, question_type,
+                 answer=None, topic=None, score=0):
+        self.survey_id = survey_id
+        self.page_id = intern(page_id)
+        self.respondent_id = respondent_id
+        self.question_id = intern(question_id)
+        self.question_type = question_type
+        self.answer = answer
+        self.topic = topic
+        self.score = score
+
+class OpenEndedRecord(Record):
+    ''' One noun phrase extracted from an open ended answer '''
+
+    __slots__ = ('survey_id', 'page_id', 'respondent_id', 'question_id', 'question_type',
+                 'answer')
+
+    def __init__(self, survey_id, page_id, respondent_id, question_id, question_type, answer):
+        self.survey_id = survey_id
+        self.page_id = page_id
+        self.respondent_id = respondent_id
+        self.question_id = question_id
+        self.question_type = question_type
+        self.answer = answer
+
+class SentimentRecord(Record):
+    ''' The sentiment of one sentence of an open ended answer '''
+
+    __slots__ = ('survey_id', 'page_id', 'respondent_id', 'question_id', 'question_type',
+                 'answer', 'polarity', 'subjectivity')
+
+    def __init__(self, survey_id, page_id, respondent_id, question_id, question_type, answer,
+                 polarity, subjectivity):
+        self.survey_id = survey_id
+        self.page_id = page_id
+        self.respondent_id = respondent_id
+        self.question_id = question_id
+        self.question_type = question_type
+        self.answer = answer
+        self.polarity = polarity
+        self.subjectivity = subjectivity
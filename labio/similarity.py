@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+'''This module computes the similar services from the local catalogue'''
+import heapq
+import importlib.util
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r'[a-z][a-z0-9]+')
+STOPWORDS = frozenset([
+    'about', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'been', 'but', 'by',
+    'can', 'description', 'for', 'from', 'has', 'have', 'if', 'in', 'into', 'is', 'it', 'its',
+    'no', 'not', 'of', 'on', 'one', 'or', 'other', 'such', 'that', 'the', 'their', 'then',
+    'there', 'these', 'this', 'those', 'to', 'use', 'used', 'using', 'was', 'which', 'will',
+    'with', 'you', 'your'
+])
+
+def tokenize(text):
+    ''' Split a text in lower case words, without stop words '''
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+def service_documents():
+    ''' Return the features of every service: the words of its description and of its
+        endpoint descriptions, its tags and its filters '''
+    from models.models import Service, Endpoint, Tag, Filters
+    session = Service.session
+    docs = {}
+    for service_id, description in session.query(Service.id, Service.description):
+        docs[service_id] = Counter(tokenize(description or ''))
+    for service_id, description in session.query(Endpoint.service_id, Endpoint.description):
+        if service_id in docs:
+            docs[service_id].update(tokenize(description or ''))
+    for service_id, name in session.query(Tag.service_id, Tag.name):
+        if service_id in docs and name:
+            docs[service_id]['tag:' + name.strip().lower()] += 1
+    for service_id, description in session.query(Filters.service_id, Filters.description):
+        if service_id in docs and description:
+            docs[service_id]['kw:' + description] += 1
+    return docs
+
+def tfidf_vectors(docs):
+    ''' Return the L2 normalized tf-idf vector of every document as a {feature: weight} dict '''
+    document_frequency = Counter()
+    for counts in docs.values():
+        document_frequency.update(counts.keys())
+    total = len(docs)
+
+    vectors = {}
+    for doc_id, counts in docs.items():
+        vector = {feature: (1.0 + math.log(count)) *
+                           (math.log((1.0 + total) / (1.0 + document_frequency[feature])) + 1.0)
+                  for feature, count in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vectors[doc_id] = {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+    return vectors
+
+def nearest_neighbours(vectors, k=10, min_score=0.0):
+    ''' Return the k most similar documents of every document as a list of
+        (doc_id, cosine similarity) pairs, highest similarity first '''
+    if _has_scipy():
+        return _nearest_sparse(vectors, k, min_score)
+    return _nearest_python(vectors, k, min_score)
+
+def _has_scipy():
+    ''' Whether numpy and scipy are installed, found without importing them '''
+    return all(importlib.util.find_spec(name) is not None for name in ('numpy', 'scipy'))
+
+def _nearest_sparse(vectors, k, min_score, block_size=1024):
+    ''' Multiply blocks of rows of the sparse tf-idf matrix by its transpose '''
+    import numpy
+    from scipy import sparse
+    ids = list(vectors)
+    features = {}
+    rows, columns, data = [], [], []
+    for row, doc_id in enumerate(ids):
+        for feature, weight in vectors[doc_id].items():
+            rows.append(row)
+            columns.append(features.setdefault(feature, len(features)))
+            data.append(weight)
+    matrix = sparse.csr_matrix((data, (rows, columns)), shape=(len(ids), len(features)))
+    transposed = matrix.T.tocsc()
+
+    neighbours = {}
+    for start in range(0, len(ids), block_size):
+        scores = (matrix[start:start + block_size] * transposed).tocsr()
+        for offset in range(scores.shape[0]):
+            row = start + offset
+            lower, upper = scores.indptr[offset], scores.indptr[offset + 1]
+            others = scores.indices[lower:upper]
+            values = scores.data[lower:upper]
+            keep = (others != row) & (values > min_score)
+            others, values = others[keep], values[keep]
+            if len(values) > k:
+                top = numpy.argpartition(-values, k)[:k]
+                others, values = others[top], values[top]
+            order = numpy.lexsort((others, -values))
+            neighbours[ids[row]] = [(ids[other], float(value))
+                                    for other, value in zip(others[order], values[order])]
+    return neighbours
+
+def _nearest_python(vectors, k, min_score):
+    ''' Accumulate the dot products through an inverted index of the features '''
+    position = {doc_id: idx for idx, doc_id in enumerate(vectors)}
+    postings = defaultdict(list)
+    for doc_id, vector in vectors.items():
+        for feature, weight in vector.items():
+            postings[feature].append((doc_id, weight))
+
+    neighbours = {}
+    for doc_id, vector in vectors.items():
+        scores = defaultdict(float)
+        for feature, weight in vector.items():
+            for other, other_weight in postings[feature]:
+                scores[other] += weight * other_weight
+        scores.pop(doc_id, None)
+        best = heapq.nsmallest(k, ((-score, position[other], other)
+                                   for other, score in scores.items() if score > min_score))
+        neighbours[doc_id] = [(other, -score) for score, _, other in best]
+    return neighbours
+
+def build_similar(k=10, min_score=0.05):
+    ''' Replace the Similar table with the k most similar services of every service '''
+    from models.models import Service, Similar
+    names = dict(Service.session.query(Service.id, Service.name))
+    neighbours = nearest_neighbours(tfidf_vectors(service_documents()), k, min_score)
+    Similar.query.delete(synchronize_session=False)
+    count = Similar.bulk_insert({'service_id': service_id,
+                                 'similar_id': other,
+                                 'name': names.get(other),
+                                 'score': score}
+                                for service_id, items in neighbours.items()
+                                for other, score in items)
+    Similar.session.commit()
+    return count
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+'''This module maintains the term statistics of the service keywords'''
+import math
+from collections import Counter
+
+from sqlalchemy import desc, select
+
+def idf(document_count, document_frequency):
+    ''' Smoothed inverse document frequency '''
+    return math.log((1.0 + document_count) / (1.0 + document_frequency)) + 1.0
+
+def tf(frequency):
+    ''' Sublinear term frequency '''
+    return 1.0 + math.log(frequency)
+
+def _chunks(values, size=500):
+    ''' Split values in lists small enough for an IN clause '''
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def update_service_terms(service_id, terms):
+    ''' Replace the term frequencies of a service by the counts of the terms list and
+        adjust the document frequencies. Returns the terms whose document frequency changed '''
+    from models.models import Service_Term, Term_Stat
+    counts = Counter(terms)
+    current = {row.term: row for row in Service_Term.query.filter(Service_Term.service_id == service_id)}
+    changed = set()
+    for term, frequency in counts.items():
+        row = current.get(term)
+        if row is None:
+            row = Service_Term()
+            row.service_id = service_id
+            row.term = term
+            row.add()
+            changed.add(term)
+        row.frequency = frequency
+        row.tf = tf(frequency)
+    for term, row in current.items():
+        if term not in counts:
+            row.delete()
+            changed.add(term)
+
+    stats = {}
+    for chunk in _chunks(changed):
+        stats.update({stat.term: stat for stat in Term_Stat.query.filter(Term_Stat.term.in_(chunk))})
+    for term in changed:
+        stat = stats.get(term)
+        if stat is None:
+            stat = Term_Stat()
+            stat.term = term
+            stat.document_frequency = 0
+            stat.add()
+        stat.document_frequency += 1 if term in counts else -1
+    # the next service must see the new term statistics
+    Term_Stat.session.flush()
+    return changed
+
+def refresh_weights(document_count, terms, service_ids):
+    ''' Recompute the idf of the changed terms and the tf-idf weight of the vectors that
+        use them. Everything is recomputed when the number of documents changed '''
+    from models.models import Service_Term, Term_Stat, Pipeline_State
+    session = Term_Stat.session
+    session.flush()
+
+    state = Pipeline_State.query.get('term_document_count')
+    full = state is None or state.value != str(document_count)
+    if full:
+        stats = Term_Stat.query.all()
+    else:
+        stats = []
+        for chunk in _chunks(terms):
+            stats += Term_Stat.query.filter(Term_Stat.term.in_(chunk)).all()
+    for stat in stats:
+        if stat.document_frequency <= 0:
+            stat.delete()
+        else:
+            stat.idf = idf(document_count, stat.document_frequency)
+    if state is None:
+        state = Pipeline_State()
+        state.name = 'term_document_count'
+        state.add()
+    state.value = str(document_count)
+    session.flush()
+
+    vectors = Service_Term.__table__
+    weight = vectors.c.tf * select([Term_Stat.__table__.c.idf]).where(
+        Term_Stat.__table__.c.term == vectors.c.term).as_scalar()
+    if full:
+        session.execute(vectors.update().values(weight=weight))
+        return
+    for chunk in _chunks(terms):
+        session.execute(vectors.update().where(vectors.c.term.in_(chunk)).values(weight=weight))
+    for chunk in _chunks(service_ids):
+        session.execute(vectors.update().where(vectors.c.service_id.in_(chunk)).values(weight=weight))
+
+def top_terms(service_id, limit=10):
+    ''' Return the (term, weight) pairs with the highest weight for a service '''
+    from models.models import Service_Term
+    return Service_Term.session.query(Service_Term.term, Service_Term.weight).filter(
+        Service_Term.service_id == service_id).order_by(desc(Service_Term.weight)).limit(limit).all()
+
+def top_services(term, limit=10):
+    ''' Return the (service_id, weight) pairs where the term has the highest weight '''
+    from models.models import Service_Term
+    return Service_Term.session.query(Service_Term.service_id, Service_Term.weight).filter(
+        Service_Term.term == term).order_by(desc(Service_Term.weight)).limit(limit).all()
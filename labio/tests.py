@@ -1,12 +1,26 @@
+import gzip
 import json
-from unittest import TestCase
+import os
+import subprocess
+import sys
+from collections import Counter
+import tempfile
+from unittest import TestCase, mock
 from re import match
 
 from sqlalchemy import Column, String, Integer
-import app.utils as utils
-from app.app import create_app
-from app.logging import pcf_logger, formatter
-import app.database as db
+from labio.SMWrapper import SurveyApi, SurveyCache, SurveyProcessor, SurveyBatchProcessor
+from labio.records import AnswerRecord
+from labio.fixtures import synthetic_survey, synthetic_matrix_survey
+from labio.cache import Cache, LRUCache
+from labio.config import AppConfig, AppTestConfig
+from labio.database import SCHEMA_REVISION
+from labio import similarity, recommend, pagecache, mockserver, terms
+import labio.utils as utils
+from labio.logging import pcf_logger, formatter
+import labio.database as db
+import webpage
+from webpage import create_app
 
 class TestModel(db.Base):
 
@@ -19,7 +33,7 @@ class TestSerializer(TestCase):
 
     @classmethod
     def setUpClass(cls):
-        create_app()
+        create_app(AppTestConfig())
         TestModel.__table__.create(db.engine)
         cls.dict1 = {'int_field': 1, 'str_field': 'test1'}
         cls.str1 = '{"int_field": 1, "str_field": "test1"}'
@@ -102,8 +116,8 @@ class TestUtils(TestCase):
 class TestLogger(TestCase):
 
     def test_pcf_logger(self):
-        ''' Should successfully use the pcf_logger at app.logging '''
-        app = create_app()
+        ''' Should successfully use the pcf_logger at labio.logging '''
+        app = create_app(AppTestConfig())
         with self.assertLogs(pcf_logger) as cm:
             pcf_logger.handlers[0].setFormatter(formatter)
             pcf_logger.info('test')
@@ -112,3 +126,423 @@ class TestLogger(TestCase):
                 pcf_logger.warning('test with context')
         assert match(r'\[INFO\] \[.+\] test', cm.output[0]) is not None
         assert match(r'\[WARNING\] \[None\] \[None\] \[POST\] \[http://localhost/test_logger/\] \[b\'{"test": "logger"}\'\] \[.+\] test with context', cm.output[1]) is not None
+
+def survey_processor(respondents=3, survey=synthetic_survey):
+    ''' Return a SurveyProcessor preloaded with a synthetic survey '''
+    details, responses = survey(respondents)
+    processor = SurveyProcessor('S1', None)
+    processor.preload(details, responses)
+    processor.build_question_data()
+    processor.build_respondent_data()
+    processor.build_answer_data()
+    return processor
+
+class TestSurveyBatchProcessor(TestCase):
+
+    def test_stage_order(self):
+        ''' Should reject stages that come before the stages they read '''
+        SurveyBatchProcessor(['S1'], None, stages=['questions', 'respondents', 'answers', 'padded'])
+        with self.assertRaises(ValueError):
+            SurveyBatchProcessor(['S1'], None, stages=['questions', 'answers', 'padded'])
+        with self.assertRaises(ValueError):
+            SurveyBatchProcessor(['S1'], None, stages=['sentiment', 'answers'])
+        with self.assertRaises(ValueError):
+            SurveyBatchProcessor(['S1'], None, stages=['unknown'])
+
+class TestSurveyProcessor(TestCase):
+
+    def test_transpose_questions(self):
+        ''' Should pivot the answers with one column per question '''
+        processor = survey_processor(2)
+        rows = processor.transpose_questions({'P1': ['Q1', 'Q2', 'Q4']})
+        assert rows == [
+            {'Question 1': '2 - Old', 'Question 2': 'Python', 'Question 4': '',
+             'respondent_id': 'A0', 'survey_id': 'S1'},
+            {'Question 1': '1 - Young', 'Question 2': 'Python#R', 'Question 4': '',
+             'respondent_id': 'A1', 'survey_id': 'S1'}]
+
+    def test_transpose_questions_topic_score(self):
+        ''' Should pivot the matrix scores with one row per topic '''
+        processor = survey_processor(2)
+        rows = processor.transpose_questions({'P1': ['Q3']}, use_topic=True, use_score=True)
+        assert [(row['respondent_id'], row['topic'], row['Question 3']) for row in rows] == [
+            ('A0', 'Speed', 5), ('A1', 'Speed', 5), ('A1', 'Price', 1)]
+
+    def test_expected_preferred(self):
+        ''' Should build one column per question and topic '''
+        processor = survey_processor(2)
+        rows = processor.expected_preferred({'P1': ['Q3']}, use_topic=False, use_score=True)
+        assert rows == [
+            {'Question 3Speed': 5, 'respondent_id': 'A0', 'survey_id': 'S1'},
+            {'Question 3Speed': 5, 'Question 3Price': 1, 'respondent_id': 'A1', 'survey_id': 'S1'}]
+
+    def test_padded_answers(self):
+        ''' Should pad each topic of the matrix questions for the first respondent '''
+        processor = survey_processor(2)
+        padded = processor.build_padded_answers()
+        assert [(row['respondent_id'], row['question_id'], row['topic'], row['score'])
+                for row in padded] == [('A0', 'Q3', '', 0.5), ('A0', 'Q3', '', 0.5)]
+
+    def test_padded_answers_large_matrix(self):
+        ''' Should pad a large matrix survey in time linear to its size '''
+        processor = survey_processor(5000, synthetic_matrix_survey)
+        padded = processor.build_padded_answers()
+        assert len(padded) == 10 * 5
+        assert {row['respondent_id'] for row in padded} == {'A0'}
+
+    def test_breakdown_multiple_answers(self):
+        ''' Should expand every combination of the multiple choice answers '''
+        processor = survey_processor(2)
+        rows = processor.transpose_questions({'P1': ['Q1', 'Q2']})
+        lines = processor.iter_multiple_answers(['Question 2'], rows)
+        assert [(line['respondent_id'], line['Question 2'], line['cnt']) for line in lines] == [
+            ('A0', 'Python', 1), ('A1', 'Python', 1), ('A1', 'R', 2)]
+        tidy = processor.breakdown_multiple_answers(['Question 1', 'Question 2'], rows, tidy=True)
+        assert [(line['question_label'], line['answer']) for line in tidy] == [
+            ('Question 1', '2 - Old'), ('Question 2', 'Python'),
+            ('Question 1', '1 - Young'), ('Question 2', 'Python'), ('Question 2', 'R')]
+
+class TestRecords(TestCase):
+
+    def test_answer_record_dict_view(self):
+        ''' Should read, update and compare an AnswerRecord like a dict '''
+        record = AnswerRecord('S1', 'P1', 'A1', 'Q1', 'matrix', '5 stars', 'Speed', 5)
+        record['score'] = 4
+        assert record['score'] == 4
+        assert record.get('missing') is None
+        assert list(record) == ['survey_id', 'page_id', 'respondent_id', 'question_id',
+                                'question_type', 'answer', 'topic', 'score']
+        assert record == {'survey_id': 'S1', 'page_id': 'P1', 'respondent_id': 'A1',
+                          'question_id': 'Q1', 'question_type': 'matrix', 'answer': '5 stars',
+                          'topic': 'Speed', 'score': 4}
+        with self.assertRaises(KeyError):
+            record['missing'] = 1
+
+    def test_build_data_serializable(self):
+        ''' Should return the built answers as plain dicts that serialize to json '''
+        processor = survey_processor(2)
+        answers = processor.build_answer_data()
+        padded = processor.build_padded_answers()
+        assert all(type(row) is dict for row in answers + padded)
+        assert json.loads(json.dumps(answers))[0] == answers[0]
+        assert json.loads(json.dumps(padded)) == padded
+
+class TestCache(TestCase):
+
+    def test_lru_cache(self):
+        ''' Should discard the least recently used entry '''
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+        assert len(cache) == 2
+
+    def test_persistent_cache(self):
+        ''' Should read back values from the persistent tier '''
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.db')
+            Cache(path=path).set('n/a', [['n/a', 0.0, 0.0]])
+            assert Cache(path=path).get('n/a') == [['n/a', 0.0, 0.0]]
+
+class TestSimilarity(TestCase):
+
+    docs = {
+        1: Counter(similarity.tokenize('Protein sequence alignment with BLAST')),
+        2: Counter(similarity.tokenize('BLAST search of protein sequences')),
+        3: Counter(similarity.tokenize('Pathway maps of the metabolism')),
+        4: Counter(similarity.tokenize('Metabolism pathway database'))
+    }
+
+    def test_nearest_neighbours(self):
+        ''' Should rank the services sharing the most specific words first '''
+        neighbours = similarity.nearest_neighbours(similarity.tfidf_vectors(self.docs), k=1)
+        assert [neighbours[doc_id][0][0] for doc_id in (1, 2, 3, 4)] == [2, 1, 4, 3]
+
+    def test_nearest_neighbours_python(self):
+        ''' Should find the same neighbours without scipy '''
+        vectors = similarity.tfidf_vectors(self.docs)
+        expected = similarity.nearest_neighbours(vectors, k=2)
+        result = similarity._nearest_python(vectors, 2, 0.0)
+        assert [[doc_id for doc_id, _ in result[key]] for key in result] == \
+            [[doc_id for doc_id, _ in expected[key]] for key in expected]
+
+class TestTerms(TestCase):
+
+    def setUp(self):
+        db.init(AppTestConfig())
+
+    def tearDown(self):
+        db.Base.session.rollback()
+        db.remove_sessions()
+
+    def update(self, documents, service_ids):
+        ''' Store the terms of the updated services like filter.py and check every
+            statistic against a full recompute over the documents '''
+        from models.models import Service_Term, Term_Stat
+        changed = set()
+        for service_id in service_ids:
+            changed |= terms.update_service_terms(service_id, documents.get(service_id, []))
+        count = len([doc for doc in documents.values() if doc])
+        terms.refresh_weights(count, changed, service_ids)
+        db.Base.session.commit()
+
+        frequencies = Counter(term for doc in documents.values() for term in set(doc))
+        stats = {stat.term: stat for stat in Term_Stat.query.all()}
+        assert {term: stat.document_frequency for term, stat in stats.items()} == frequencies
+        for term, stat in stats.items():
+            self.assertAlmostEqual(stat.idf, terms.idf(count, frequencies[term]))
+        weights = {(row.service_id, row.term): row.weight for row in Service_Term.query.all()}
+        expected = {(service_id, term): terms.tf(frequency) * terms.idf(count, frequencies[term])
+                    for service_id, doc in documents.items()
+                    for term, frequency in Counter(doc).items()}
+        assert weights.keys() == expected.keys()
+        for key, weight in weights.items():
+            self.assertAlmostEqual(weight, expected[key])
+
+    def test_incremental_weights(self):
+        ''' Should keep the same statistics as a full recompute over several runs '''
+        documents = {1: ['protein', 'sequence', 'protein'], 2: ['protein', 'blast'],
+                     3: ['pathway', 'database']}
+        self.update(documents, [1, 2, 3])
+        # same number of services: only the changed terms and services are reweighted
+        documents[2] = ['blast', 'search', 'search']
+        self.update(documents, [2])
+        # a new service changes the idf of every term
+        documents[4] = ['pathway', 'protein']
+        self.update(documents, [4])
+        # the last service with a term drops it
+        documents[3] = ['pathway']
+        self.update(documents, [3])
+        # a removed service
+        documents[1] = []
+        self.update(documents, [1])
+
+class TestRecommend(TestCase):
+
+    def setUp(self):
+        docs = {key: Counter(doc) for key, doc in TestSimilarity.docs.items()}
+        docs[3]['tag:metabolic pathways'] += 1
+        self.index = recommend.RecommendIndex(
+            1, {1: 'blastp', 2: 'blast', 3: 'kegg', 4: 'reactome'}, {},
+            recommend._postings(similarity.tfidf_vectors(docs)), {})
+
+    def test_rank(self):
+        ''' Should score the documents by the query words they share '''
+        ranked = recommend._rank(self.index.service_postings,
+                                 Counter(similarity.tokenize('protein alignment')), 2)
+        assert [service_id for _, service_id in ranked] == [1, 2]
+
+    def test_search_tag(self):
+        ''' Should match a query naming a tag '''
+        result = self.index.search('Metabolic pathways', limit=1)
+        assert result['version'] == 1
+        assert result['services'][0]['name'] == 'kegg'
+
+class TestConfig(TestCase):
+
+    def test_environment_override(self):
+        ''' Should read the settings from the environment, keeping their type '''
+        with mock.patch.dict(os.environ, {'DB_POOL_SIZE': '20', 'DB_SERVER': 'sqlite:///other.db'}):
+            settings = AppConfig()
+        assert settings.DB_POOL_SIZE == 20
+        assert settings.DB_SERVER == 'sqlite:///other.db'
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DB_POOL_SIZE', None)
+            assert AppConfig().DB_POOL_SIZE == 5
+
+class TestMigrations(TestCase):
+
+    def test_schema_revision(self):
+        ''' Should match the head of the alembic migrations '''
+        from alembic.script import ScriptDirectory
+        directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'alembic')
+        assert ScriptDirectory(directory).get_current_head() == SCHEMA_REVISION
+
+class TestImportTime(TestCase):
+    ''' Checks with python -X importtime the modules the entry points load '''
+
+    @staticmethod
+    def import_times(statement):
+        ''' Return the cumulative import time in microseconds of every module the statement imports '''
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=root,
+                                stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            _, cumulative, module = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+        return times
+
+    def test_labio_import(self):
+        ''' Should import labio without the database, NLP and scraping libraries '''
+        times = self.import_times('import labio')
+        for module in ('sqlalchemy', 'marshmallow_sqlalchemy', 'requests', 'nltk', 'textblob', 'bs4', 'flask'):
+            assert module not in times, module
+
+    def test_recommend_import(self):
+        ''' Should load the web app modules without the NLP and scraping libraries '''
+        times = self.import_times('import labio.recommend, labio.SMWrapper')
+        for module in ('nltk', 'textblob', 'scipy', 'bs4'):
+            assert module not in times, module
+
+class TestPageCache(TestCase):
+
+    def test_accepted_encoding(self):
+        ''' Should pick gzip unless the client refuses it '''
+        assert pagecache.accepted_encoding('gzip, deflate') == 'gzip'
+        assert pagecache.accepted_encoding('gzip;q=0, identity') is None
+        assert pagecache.accepted_encoding('') is None
+
+    def test_cached_page(self):
+        ''' Should give every encoding of a page its own strong ETag '''
+        page = pagecache.PageCache(maxsize=2).set('1:/services', '<html></html>')
+        assert pagecache.PageCache().get('1:/services') is None
+        assert page.entity_tag('gzip') == page.etag + '-gzip'
+        assert gzip.decompress(page.encoded('gzip')) == b'<html></html>'
+        # no timestamp in the gzip header, the same page always compresses to the same bytes
+        assert page.encoded('gzip')[4:8] == bytes(4)
+
+    def test_not_modified(self):
+        ''' Should render a page once and answer 304 to a client that sends its ETag,
+            whatever the query string '''
+        client = create_app(AppTestConfig()).test_client()
+        with mock.patch('webpage.render_template', wraps=webpage.render_template) as render:
+            first = client.get('/services')
+            second = client.get('/services?x=1', headers={'If-None-Match': first.headers['ETag']})
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert second.headers['ETag'] == first.headers['ETag']
+        assert render.call_count == 1
+
+class TestMockServer(TestCase):
+
+    def test_services_pages(self):
+        ''' Should split the catalogue in pages of services hosted by the server '''
+        import requests
+        catalogue = mockserver.MockCatalogue(services=30, per_page=25)
+        with mockserver.MockServer(catalogue) as server:
+            first = requests.get(server.url + '/services.json').json()['services']
+            last = requests.get(server.url + '/services.json?page=2').json()['services']
+            assert (first['pages'], first['total'], len(first['results'])) == (2, 30, 25)
+            assert last['results'][-1]['resource'] == server.url + '/services/30'
+            assert requests.get(server.url + '/services/31.json').status_code == 404
+
+    def test_error_rate(self):
+        ''' Should answer the requests with 503 errors at the error rate '''
+        import requests
+        with mockserver.MockServer(mockserver.MockCatalogue(), error_rate=1.0) as server:
+            assert requests.get(server.url + '/services.json').status_code == 503
+
+class TestSurveyApi(TestCase):
+
+    def test_stream_survey_data(self):
+        ''' Should yield the same responses with and without ijson '''
+        details, responses = synthetic_survey(3)
+        catalogue = mockserver.MockCatalogue()
+        catalogue.add_survey('S1', details, responses)
+        with mockserver.MockServer(catalogue) as server:
+            api = SurveyApi('token', host=server.url)
+            assert list(api.iter_survey_data('S1')) == responses
+            with mock.patch('labio.SMWrapper.ijson', None):
+                assert list(api.iter_survey_data('S1')) == responses
+
+    def test_page_errors(self):
+        ''' Should raise on an error status or a page without data, not yield nothing '''
+        import requests
+        catalogue = mockserver.MockCatalogue()
+        catalogue.add_survey('S1', *synthetic_survey(3))
+        with mockserver.MockServer(catalogue) as server:
+            api = SurveyApi('token', host=server.url)
+
+            def check():
+                with self.assertRaises(ValueError):
+                    list(api.iter_paginated_results(server.url + '/v3/surveys/S1', 0))
+                with self.assertRaises(requests.HTTPError):
+                    list(api.iter_survey_data('S2'))
+            check()
+            with mock.patch('labio.SMWrapper.ijson', None):
+                check()
+
+    def test_spool_survey_data(self):
+        ''' Should keep the spool of a complete download and nothing of a failed one '''
+        import requests
+        details, responses = synthetic_survey(3)
+        catalogue = mockserver.MockCatalogue()
+        catalogue.add_survey('S1', details, responses)
+        with tempfile.TemporaryDirectory() as directory:
+            with mockserver.MockServer(catalogue, error_rate=1.0) as server:
+                api = SurveyApi('token', host=server.url)
+                with mock.patch.object(api, 'get_survey_info', return_value={
+                        'date_modified': '2019-06-24', 'response_count': 3}):
+                    processor = SurveyProcessor('S1', None, api=api, cache=SurveyCache(directory))
+                    with self.assertRaises(requests.HTTPError):
+                        processor.build_respondent_data()
+            assert os.listdir(directory) == []
+            with mockserver.MockServer(catalogue) as server:
+                api = SurveyApi('token', host=server.url)
+                processor = SurveyProcessor('S1', None, api=api, cache=SurveyCache(directory))
+                with mock.patch.object(api, 'iter_survey_data', wraps=api.iter_survey_data) as download:
+                    respondents = processor.build_respondent_data()
+                    assert [row['respondent_id'] for row in respondents] == ['A0', 'A1', 'A2']
+                    processor.build_answer_data()
+                    assert download.call_count == 1
+
+def counted_api(url):
+    ''' Return a SurveyApi of the mock server that counts the calls of its api methods '''
+    api = SurveyApi('token', host=url)
+    for name in ('get_survey_info', 'get_survey', 'get_collector_details', 'iter_survey_data'):
+        setattr(api, name, mock.Mock(wraps=getattr(api, name), __name__=name))
+    return api
+
+def process_survey(api, cache=None):
+    ''' Build the records of survey S1 like survey.py, reading every payload twice '''
+    processor = SurveyProcessor('S1', None, api=api, cache=cache)
+    for _ in range(2):
+        processor.build_question_data()
+        processor.build_respondent_data()
+        processor.build_answer_data()
+        processor.build_collectors_data()
+    return processor
+
+class TestSurveyCache(TestCase):
+
+    def test_fetch_once(self):
+        ''' Should fetch every payload at most once per processor '''
+        catalogue = mockserver.MockCatalogue()
+        catalogue.add_survey('S1', *synthetic_survey(3))
+        with mockserver.MockServer(catalogue) as server:
+            api = counted_api(server.url)
+            process_survey(api)
+            assert (api.get_survey.call_count, api.get_collector_details.call_count,
+                    api.iter_survey_data.call_count) == (1, 1, 1)
+            api = counted_api(server.url)
+            with tempfile.TemporaryDirectory() as directory:
+                process_survey(api, SurveyCache(directory))
+            assert (api.get_survey_info.call_count, api.get_survey.call_count,
+                    api.get_collector_details.call_count, api.iter_survey_data.call_count) == (1, 1, 1, 1)
+
+    def test_unchanged_survey(self):
+        ''' Should read an unchanged survey version from disk and fetch a changed one '''
+        details, responses = synthetic_survey(3)
+        catalogue = mockserver.MockCatalogue()
+        catalogue.add_survey('S1', details, responses)
+        with mockserver.MockServer(catalogue) as server, \
+                tempfile.TemporaryDirectory() as directory:
+            first = process_survey(counted_api(server.url), SurveyCache(directory))
+            api = counted_api(server.url)
+            second = process_survey(api, SurveyCache(directory))
+            assert (api.get_survey_info.call_count, api.get_survey.call_count,
+                    api.get_collector_details.call_count, api.iter_survey_data.call_count) == (1, 0, 0, 0)
+            assert ([dict(record) for record in second.build_answer_data()] ==
+                    [dict(record) for record in first.build_answer_data()])
+            catalogue.add_survey('S1', *synthetic_survey(4))
+            api = counted_api(server.url)
+            respondents = process_survey(api, SurveyCache(directory)).build_respondent_data()
+            assert len(respondents) == 4
+            assert (api.get_survey.call_count, api.iter_survey_data.call_count) == (1, 1)
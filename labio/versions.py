@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+'''This module keeps the version counters the pipeline publishes to the web app'''
+import time
+
+CATALOGUE = 'catalogue_version'
+
+# {name: (version, time of the check)} of this process
+_checked = {}
+
+def get_version(name=CATALOGUE):
+    ''' Return the current value of a version counter, 0 when it was never published '''
+    from models.models import Pipeline_State
+    value = Pipeline_State.session.query(Pipeline_State.value).filter(
+        Pipeline_State.name == name).scalar()
+    return int(value) if value else 0
+
+def publish_version(name=CATALOGUE):
+    ''' Increment a version counter and commit it. Returns the new version.
+        A new catalogue version makes the web workers reload their recommendation
+        index and stop answering from the pages they cached for the old one '''
+    from models.models import Pipeline_State
+    state = Pipeline_State.query.get(name)
+    if state is None:
+        state = Pipeline_State()
+        state.name = name
+        state.value = '0'
+        state.add()
+    state.value = str(int(state.value or 0) + 1)
+    Pipeline_State.session.commit()
+    return int(state.value)
+
+def cached_version(max_age, name=CATALOGUE):
+    ''' Return the version counter read at most max_age seconds ago by this process '''
+    version, checked = _checked.get(name, (None, 0.0))
+    now = time.monotonic()
+    if version is None or now - checked >= max_age:
+        version = get_version(name)
+        _checked[name] = (version, now)
+    return version
@@ -1,9 +1,9 @@
 #set PYTHONPATH=.
 
 ''' Module for Services models and schemas '''
-from sqlalchemy import (Column, String, Integer, DateTime, func, Sequence, ForeignKey, Table)
+from sqlalchemy import (Column, String, Integer, Float, DateTime, func, Sequence, ForeignKey, Table, Index, UniqueConstraint)
 from labio.database import Base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 
 class Services_List(Base):
@@ -15,14 +15,17 @@ class Service(Base):
     __tablename__ = 'service'
     id = Column(Integer, primary_key=True)
     name = Column(String)
-    description = Column(String)
+    # long text, only loaded when read
+    description = deferred(Column(String))
     entrypoint = Column(String)
     base_url = Column(String)
     doc_url = Column(String)
     svc_end = relationship("Endpoint") 
-    svc_sim = relationship("Similar")
+    svc_sim = relationship("Similar", foreign_keys="Similar.service_id")
     svc_tag = relationship("Tag")
     svc_filter = relationship("Filters")
+    svc_deploy = relationship("Service_Deployment")
+    svc_variant = relationship("Service_Variant")
    
 class Endpoints_List(Base):
     __tablename__ = 'endpoints_list'
@@ -38,16 +41,42 @@ class Endpoint(Base):
     name = Column(String)
     label = Column(String)
     template = Column(String)
-    description = Column(String)
+    description = deferred(Column(String))
     parameters = Column(String)
     service_name = Column(String)
     service_id = Column(Integer,ForeignKey('service.id'))
+    end_param = relationship("Endpoint_Parameter")
+
+class Endpoint_Parameter(Base):
+    __tablename__ = 'endpoint_parameter'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, index=True)
+    description = Column(String)
+    endpoint_id = Column(Integer,ForeignKey('endpoint.id'), index=True)
+    service_id = Column(Integer,ForeignKey('service.id'))
+
+class Service_Deployment(Base):
+    __tablename__ = 'service_deployment'
+    id = Column(Integer, primary_key=True)
+    base_url = Column(String, index=True)
+    provider = Column(String, index=True)
+    country = Column(String)
+    service_id = Column(Integer,ForeignKey('service.id'), index=True)
+
+class Service_Variant(Base):
+    __tablename__ = 'service_variant'
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    doc_url = Column(String)
+    service_id = Column(Integer,ForeignKey('service.id'), index=True)
 
 class Similar(Base):
     __tablename__ = 'similar'
     id = Column(Integer, primary_key=True)
     name = Column(String)
     service_id = Column(Integer,ForeignKey('service.id'))
+    similar_id = Column(Integer,ForeignKey('service.id'))
+    score = Column(Float)
 
 class Tag(Base):
     __tablename__ = 'tag'
@@ -73,6 +102,99 @@ class Details(Base):
 
 class Filters(Base):
     __tablename__ = 'filter'
+    __table_args__ = (UniqueConstraint('service_id', 'description', name='uq_filter_service_description'),)
     id = Column(Integer, Sequence('id_seq'), primary_key=True)
     description = Column(String)
-    service_id = Column(Integer,ForeignKey('service.id'))
\ No newline at end of file
+    service_id = Column(Integer,ForeignKey('service.id'))
+
+class Filters_Hash(Base):
+    __tablename__ = 'filter_hash'
+    service_id = Column(Integer,ForeignKey('service.id'), primary_key=True)
+    description_hash = Column(String)
+
+class Term_Stat(Base):
+    __tablename__ = 'term_stat'
+    term = Column(String, primary_key=True)
+    document_frequency = Column(Integer)
+    idf = Column(Float)
+
+class Service_Term(Base):
+    __tablename__ = 'service_term'
+    __table_args__ = (Index('ix_service_term_term_weight', 'term', 'weight'),)
+    service_id = Column(Integer,ForeignKey('service.id'), primary_key=True)
+    term = Column(String, primary_key=True)
+    frequency = Column(Integer)
+    tf = Column(Float)
+    weight = Column(Float)
+
+class Pipeline_State(Base):
+    __tablename__ = 'pipeline_state'
+    name = Column(String, primary_key=True)
+    value = Column(String)
+
+class Survey_Question(Base):
+    __tablename__ = 'survey_question'
+    id = Column(Integer, primary_key=True)
+    survey_id = Column(String, index=True)
+    page_id = Column(String)
+    question_id = Column(String)
+    question_label = Column(String)
+    question_heading = Column(String)
+    question_type = Column(String)
+
+class Survey_Respondent(Base):
+    __tablename__ = 'survey_respondent'
+    id = Column(Integer, primary_key=True)
+    survey_id = Column(String, index=True)
+    respondent_id = Column(String)
+    duration_seconds = Column(Integer)
+    start_date = Column(String)
+    end_date = Column(String)
+    ip_address = Column(String)
+    collector_id = Column(String)
+    status = Column(String)
+
+class Survey_Answer(Base):
+    __tablename__ = 'survey_answer'
+    __table_args__ = (Index('ix_survey_answer_question', 'survey_id', 'question_id'),
+                      Index('ix_survey_answer_respondent', 'survey_id', 'respondent_id'))
+    id = Column(Integer, primary_key=True)
+    survey_id = Column(String)
+    page_id = Column(String)
+    respondent_id = Column(String)
+    question_id = Column(String)
+    question_type = Column(String)
+    answer = Column(String)
+    topic = Column(String)
+    score = Column(Float)
+
+class Survey_Open_Ended(Base):
+    __tablename__ = 'survey_open_ended'
+    __table_args__ = (Index('ix_survey_open_ended_question', 'survey_id', 'question_id'),)
+    id = Column(Integer, primary_key=True)
+    survey_id = Column(String)
+    page_id = Column(String)
+    respondent_id = Column(String)
+    question_id = Column(String)
+    question_type = Column(String)
+    answer = Column(String)
+
+class Survey_Sentiment(Base):
+    __tablename__ = 'survey_sentiment'
+    __table_args__ = (Index('ix_survey_sentiment_question', 'survey_id', 'question_id'),)
+    id = Column(Integer, primary_key=True)
+    survey_id = Column(String)
+    page_id = Column(String)
+    respondent_id = Column(String)
+    question_id = Column(String)
+    question_type = Column(String)
+    answer = Column(String)
+    polarity = Column(Float)
+    subjectivity = Column(Float)
+
+class Survey_Collector(Base):
+    __tablename__ = 'survey_collector'
+    id = Column(Integer, primary_key=True)
+    survey_id = Column(String, index=True)
+    collector_id = Column(String)
+    name = Column(String)
@@ -1,11 +1,17 @@
 from models.models import Services_List
 from models.models import Service
+from models.models import Service_Deployment
+from models.models import Service_Variant
 from models.models import Details
 from models.models import Logs
 import requests, json, labio
+from labio.versions import publish_version
 
 labio.db.init()
 
+# every deployment and variant of every service, stored together at the end
+deployments = []
+variants = []
 for svc in Services_List.query.all():
     response = requests.get(svc.url+'.json')
     services = response.json()
@@ -18,9 +24,27 @@ for svc in Services_List.query.all():
     if svc_record.description == None or svc_record.description == '':
         svc_record.description = 'No Description' 
     for deployment in services['deployments']:  
-        svc_record.base_url = deployment['endpoint']
+        provider = deployment.get('service_provider') or {}
+        location = deployment.get('location') or {}
+        deployments.append({'base_url': deployment['endpoint'],
+                            'provider': provider.get('name'),
+                            'country': location.get('country'),
+                            'service_id': svc.id})
     for variant in services['variants']:
-        svc_record.doc_url = variant['documentation_url']
+        variants.append({'name': variant.get('name'),
+                         'doc_url': variant['documentation_url'],
+                         'service_id': svc.id})
+    # the first deployment and variant are the main ones
+    if services['deployments']:
+        svc_record.base_url = services['deployments'][0]['endpoint']
+    if services['variants']:
+        svc_record.doc_url = services['variants'][0]['documentation_url']
     svc_record.merge()
     svc_record.session.commit()
 svc_record.session.commit()
+Service_Deployment.query.delete(synchronize_session=False)
+Service_Variant.query.delete(synchronize_session=False)
+print('deployments:', Service_Deployment.bulk_insert(deployments))
+print('variants:', Service_Variant.bulk_insert(variants))
+Service_Deployment.session.commit()
+publish_version()
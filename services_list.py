@@ -3,11 +3,13 @@ from models.models import Details
 from models.models import Logs
 import requests, json, labio, re
 from bs4 import BeautifulSoup
+from labio.versions import publish_version
 
 labio.db.init()
+biocatalogue = labio.config.BIOCATALOGUE_URL.rstrip('/')
 
 # request de api em objeto json
-response = requests.get('https://www.biocatalogue.org/services.json')
+response = requests.get(biocatalogue+'/services.json')
 services = response.json()
 # 200 = ok
 print(response.status_code)
@@ -15,7 +17,7 @@ print(response.status_code)
 pages = services['services']['pages'] + 1
 
 for x in range(1, pages):
-    response = requests.get('https://www.biocatalogue.org/services.json?page='+str(x))
+    response = requests.get(biocatalogue+'/services.json?page='+str(x))
     services = response.json()
     if response.status_code != 200:
         print("Erro na requisição! Página", x)
@@ -27,8 +29,9 @@ for x in range(1, pages):
         # atribui os campos e adiciona
         svc_record.url = service['resource']
         id = svc_record.url
-        id = re.sub('[^0-9]', '', id)
+        id = re.sub('[^0-9]', '', id.rsplit('/', 1)[-1])
         svc_record.id = id
         svc_record.merge()
         svc_record.session.commit()
 svc_record.session.commit()
+publish_version()
@@ -0,0 +1,36 @@
+from models.models import Survey_Question
+from models.models import Survey_Respondent
+from models.models import Survey_Answer
+from models.models import Survey_Open_Ended
+from models.models import Survey_Sentiment
+from models.models import Survey_Collector
+from labio.SMWrapper import SurveyBatchProcessor
+from itertools import groupby
+import sys, labio
+
+labio.db.init()
+
+# usage: python survey.py <survey_id> [<survey_id> ...]
+survey_ids = sys.argv[1:]
+
+MODELS = {
+    'questions': Survey_Question,
+    'respondents': Survey_Respondent,
+    'answers': Survey_Answer,
+    'collectors': Survey_Collector,
+    'open_ended': Survey_Open_Ended,
+    'sentiment': Survey_Sentiment
+}
+STAGES = ['questions', 'respondents', 'answers', 'collectors', 'open_ended', 'sentiment']
+
+batch = SurveyBatchProcessor(survey_ids, labio.config.SM_ACCESS_TOKEN, stages=STAGES)
+
+# the records of a survey arrive together, stage by stage
+for survey_id, records in groupby(batch.process(), key=lambda record: record[0]):
+    # replace what was stored for this survey in a previous run
+    for model in MODELS.values():
+        model.query.filter(model.survey_id == survey_id).delete(synchronize_session=False)
+    for stage, rows in groupby(records, key=lambda record: record[1]):
+        count = MODELS[stage].bulk_insert(row for _, _, row in rows)
+        print('survey:', survey_id, '-', stage, count)
+    Survey_Answer.session.commit()
@@ -6,6 +6,7 @@ from models.models import Logs
 import requests
 import labio
 from bs4 import BeautifulSoup
+from labio.versions import publish_version
 
 labio.db.init()
 
@@ -26,9 +27,6 @@ for item in svcs:
             tag_record.service_id = item.id
             tag_record.name = tag_li.get_text()
             tag_record.merge()
-            detail = Details()
-            detail.detail_id = detail.query.count()+1
-            detail.detail_name = 'added service'+svc_record.name
             Tag.session.commit()   
 Tag.session.commit()
-
+publish_version()
@@ -7,33 +7,79 @@ from models.models import Details
 from models.models import Logs
 from models.models import Filters
 import labio
-from flask import Flask, render_template, url_for
+from labio.database import truncated
+from labio import NPParser, recommend as recommender
+from labio.pagecache import PageCache, cached
+from flask import Flask, current_app, render_template, url_for, request, jsonify
 
-app = Flask(__name__)
-labio.db.init()
-
-@app.route('/')
 def index():
-    logs = Logs.query.all()
+    logs = Logs.listing(Logs.log_id, Logs.log_name, Logs.log_status, Logs.time_created,
+                        Logs.time_updated)
     return render_template('index.html', logs=logs)
 
-@app.route('/services')
 def services():
-    svcs = Service.query.all()
+    svcs = Service.listing(Service.id, Service.name, truncated(Service.description),
+                           Service.entrypoint, Service.base_url, Service.doc_url)
     return render_template('services.html', svcs=svcs)
 
-@app.route('/endpoints')
 def endpoints():
-    endps = Endpoint.query.all()
+    endps = Endpoint.listing(Endpoint.id, Endpoint.name, Endpoint.label,
+                             truncated(Endpoint.description), Endpoint.url, Endpoint.template,
+                             Endpoint.parameters, Endpoint.service_name)
     return render_template('endpoints.html', endps=endps)
 
-@app.route('/details')
 def details():
-    dets = Details.query.all()
+    dets = Details.listing(Details.detail_id, Details.detail_name,
+                           truncated(Details.detail_description), Details.log_id)
     return render_template('details.html', dets=dets)
 
-@app.route('/filters')
 def filters():
-    fils = Filters.query.all()
+    fils = Filters.listing(Filters.id, Filters.description, Filters.service_id)
     return render_template('filters.html', fils=fils)
-    
\ No newline at end of file
+
+def recommend():
+    query = request.args.get('q', '')
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    if not query.strip():
+        return jsonify({'error': 'missing query parameter q'}), 400
+    return jsonify(recommender.recommend(query, limit,
+                                         current_app.config['CATALOGUE_CHECK_INTERVAL']))
+
+def remove_sessions(exception=None):
+    labio.db.remove_sessions()
+
+# (rule, view, rendered once per catalogue version)
+ROUTES = [
+    ('/', index, False),
+    ('/services', services, True),
+    ('/endpoints', endpoints, True),
+    ('/details', details, True),
+    ('/filters', filters, True),
+    ('/recommend', recommend, False)
+]
+
+def create_app(config=None):
+    ''' Builds the web app. With gunicorn --preload it runs once in the master, so the
+        compiled templates and the recommendation index are shared by the workers '''
+    config = config or labio.config
+    app = Flask(__name__)
+    app.config.from_object(config)
+    labio.db.init(config)
+    page_cache = cached(PageCache.from_config(config), config.CATALOGUE_CHECK_INTERVAL)
+    for rule, view, cache in ROUTES:
+        app.add_url_rule(rule, view.__name__, page_cache(view) if cache else view)
+    app.teardown_appcontext(remove_sessions)
+
+    # load the read only data before the workers are forked
+    if config.WEB_PRELOAD:
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
+        NPParser.get_tagger()
+        recommender.get_index(config.CATALOGUE_CHECK_INTERVAL)
+        # no connection is left open to be inherited by the workers
+        labio.db.dispose()
+    labio.db.remove_sessions()
+    return app
+
+if __name__ == '__main__':
+    create_app().run()